@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Values recomputed on a schedule by one background thread
+- Readers get the last computed value without touching the source, so
+  the number of viewers never multiplies the load on it
+- Each refresh publishes an immutable snapshot with one attribute store:
+  reads take no lock and never wait on a slow source
+- A failed refresh keeps serving the previous value, flagged as stale
+  once it is older than `stale_after`
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot(NamedTuple):
+    value: Any
+    refreshed_at: Optional[float]   # last successful refresh (epoch seconds)
+    attempted_at: Optional[float]   # last refresh attempt, successful or not
+    duration_s: Optional[float]     # how long the last attempt took
+    error: Optional[str]            # error of the last attempt, if it failed
+
+
+_EMPTY = Snapshot(None, None, None, None, None)
+
+
+class RefreshedValue:
+    """Result of `fetch()` recomputed every `interval` seconds"""
+
+    def __init__(self, name: str, fetch: Callable[[], Any], interval: float,
+                 stale_after: Optional[float] = None):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else 3 * interval
+        self.current: Snapshot = _EMPTY
+        # Called with each new snapshot from the refreshing thread
+        self.listeners: List[Callable[[Snapshot], None]] = []
+        self.running = False
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def value(self) -> Any:
+        return self.current.value
+
+    def refresh(self):
+        # Single flight: a refresh already running is as good as a new one
+        if not self._refresh_lock.acquire(blocking=False):
+            with self._refresh_lock:
+                return
+        try:
+            started = time.time()
+            try:
+                value = self.fetch()
+            except Exception as e:
+                logger.warning(f"Refreshing {self.name} failed: {e}")
+                previous = self.current
+                self.current = previous._replace(
+                    attempted_at=started, duration_s=time.time() - started, error=str(e)
+                )
+            else:
+                finished = time.time()
+                self.current = Snapshot(value, finished, started, finished - started, None)
+            self._notify(self.current)
+        finally:
+            self._refresh_lock.release()
+
+    def _notify(self, snapshot: Snapshot):
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.warning(f"{self.name} listener failed: {e}")
+
+    def get(self) -> Any:
+        """Last value. Without a running refresher, the first call computes it inline"""
+        if not self.running and self.current.refreshed_at is None:
+            self.refresh()
+        return self.current.value
+
+    def start(self):
+        self.running = True
+
+        def run():
+            while not self._stop.is_set():
+                self.refresh()
+                self._stop.wait(self.interval)
+
+        threading.Thread(target=run, name=f'{self.name}-refresh', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self.running = False
+
+    def stats(self, snapshot: Optional[Snapshot] = None) -> Dict:
+        """Staleness metadata for a snapshot (default: the current one)"""
+        snapshot = snapshot or self.current
+        age = time.time() - snapshot.refreshed_at if snapshot.refreshed_at else None
+        return {
+            'interval_s': self.interval,
+            'refreshed_at': snapshot.refreshed_at,
+            'age_s': round(age, 3) if age is not None else None,
+            'stale': age is None or age > self.stale_after,
+            'last_attempt_s': round(snapshot.duration_s, 4) if snapshot.duration_s is not None else None,
+            'last_error': snapshot.error
+        }
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Server-Sent Events fan-out
+- One thread writes every event to every subscriber: each event is
+  serialized once, sockets are non-blocking, and a subscriber that falls
+  too far behind is dropped instead of stalling the others
+- Heartbeat comments keep proxies and idle timers from closing streams
+- Reconnects with Last-Event-ID replay from a short history; new or
+  too-old subscribers get the latest event of each type instead
+"""
+
+import json
+import logging
+import selectors
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/event-stream; charset=utf-8'
+HEARTBEAT_INTERVAL = 15.0
+HISTORY_SIZE = 256
+RETRY_MS = 2000
+# Unsent bytes a subscriber may accumulate before it is disconnected
+MAX_PENDING_BYTES = 256 * 1024
+
+
+def format_event(event_id: str, event: str, data) -> bytes:
+    payload = json.dumps(data, default=str)
+    lines = [f'id: {event_id}', f'event: {event}']
+    lines.extend(f'data: {line}' for line in payload.splitlines())
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class _Subscriber:
+    __slots__ = ('sock', 'chunked', 'after', 'pending', 'writing')
+
+    def __init__(self, sock: socket.socket, chunked: bool, after: int):
+        self.sock = sock
+        self.chunked = chunked
+        # Events up to this sequence number are already in `pending`
+        self.after = after
+        self.pending = bytearray()
+        self.writing = False
+
+    def frame(self, message: bytes) -> bytes:
+        return b'%x\r\n%s\r\n' % (len(message), message) if self.chunked else message
+
+
+class EventBroadcaster:
+    """Publish JSON events to every attached SSE connection"""
+
+    def __init__(self, heartbeat: float = HEARTBEAT_INTERVAL, history: int = HISTORY_SIZE,
+                 max_pending: int = MAX_PENDING_BYTES):
+        self.heartbeat = heartbeat
+        self.max_pending = max_pending
+        # Ids are '<stream>-<seq>' so ids from a previous process never match
+        self.stream_id = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._history: deque = deque(maxlen=history)
+        self._latest: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._outbox: List = []
+        self._attaching: List[_Subscriber] = []
+        self._lock = threading.Lock()
+        self._subscribers: Dict[socket.socket, _Subscriber] = {}
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.published = 0
+        self.connected = 0
+        self.dropped_slow = 0
+
+    def publish(self, event: str, data):
+        with self._lock:
+            self._seq += 1
+            message = format_event(f'{self.stream_id}-{self._seq}', event, data)
+            self._history.append((self._seq, message))
+            self._latest[event] = message
+            self._outbox.append((self._seq, message))
+            self.published += 1
+        self._wake()
+
+    def attach(self, sock: socket.socket, chunked: bool, last_event_id: Optional[str] = None):
+        """Take ownership of a connection whose response headers are already sent"""
+        sock.setblocking(False)
+        with self._lock:
+            subscriber = _Subscriber(sock, chunked, self._seq)
+            backlog = self._backlog(last_event_id)
+            subscriber.pending += subscriber.frame(f'retry: {RETRY_MS}\n\n'.encode())
+            for message in backlog:
+                subscriber.pending += subscriber.frame(message)
+            self._attaching.append(subscriber)
+        self._wake()
+
+    def _backlog(self, last_event_id: Optional[str]) -> List[bytes]:
+        stream, _, seq = (last_event_id or '').strip().rpartition('-')
+        if stream == self.stream_id and seq.isdigit():
+            seq = int(seq)
+            oldest = self._history[0][0] if self._history else self._seq + 1
+            if seq >= oldest - 1:
+                return [message for event_seq, message in self._history if event_seq > seq]
+        return list(self._latest.values())
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            # Buffer full: the loop is already due to wake up
+            pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sse-fanout', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        for subscriber in list(self._subscribers.values()):
+            if subscriber.chunked:
+                try:
+                    subscriber.sock.send(b'0\r\n\r\n')
+                except OSError:
+                    pass
+            self._drop(subscriber)
+
+    def _run(self):
+        next_heartbeat = time.monotonic() + self.heartbeat
+        while not self._stop.is_set():
+            timeout = max(0.0, next_heartbeat - time.monotonic())
+            for key, mask in self._selector.select(timeout):
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                subscriber = key.data
+                if mask & selectors.EVENT_READ:
+                    self._check_closed(subscriber)
+                if mask & selectors.EVENT_WRITE and subscriber.sock in self._subscribers:
+                    self._flush(subscriber)
+
+            with self._lock:
+                attaching, self._attaching = self._attaching, []
+                outbox, self._outbox = self._outbox, []
+            for subscriber in attaching:
+                self._subscribers[subscriber.sock] = subscriber
+                self._selector.register(subscriber.sock, selectors.EVENT_READ, subscriber)
+                self.connected += 1
+                self._flush(subscriber)
+            for seq, message in outbox:
+                for subscriber in list(self._subscribers.values()):
+                    if seq > subscriber.after:
+                        self._send(subscriber, subscriber.frame(message))
+
+            if time.monotonic() >= next_heartbeat:
+                for subscriber in list(self._subscribers.values()):
+                    self._send(subscriber, subscriber.frame(b': heartbeat\n\n'))
+                next_heartbeat = time.monotonic() + self.heartbeat
+
+    def _check_closed(self, subscriber: _Subscriber):
+        # Clients never send after the request; readable means EOF or reset
+        try:
+            data = subscriber.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(subscriber)
+
+    def _send(self, subscriber: _Subscriber, data: bytes):
+        subscriber.pending += data
+        if len(subscriber.pending) > self.max_pending:
+            self.dropped_slow += 1
+            logger.info("Dropping slow SSE subscriber")
+            self._drop(subscriber)
+            return
+        self._flush(subscriber)
+
+    def _flush(self, subscriber: _Subscriber):
+        try:
+            while subscriber.pending:
+                sent = subscriber.sock.send(subscriber.pending)
+                del subscriber.pending[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._drop(subscriber)
+            return
+        writing = bool(subscriber.pending)
+        if writing != subscriber.writing:
+            subscriber.writing = writing
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+            self._selector.modify(subscriber.sock, events, subscriber)
+
+    def _drop(self, subscriber: _Subscriber):
+        if self._subscribers.pop(subscriber.sock, None) is not None:
+            try:
+                self._selector.unregister(subscriber.sock)
+            except (KeyError, ValueError):
+                pass
+        try:
+            subscriber.sock.close()
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        return {
+            'subscribers': len(self._subscribers),
+            'connected_total': self.connected,
+            'published': self.published,
+            'dropped_slow': self.dropped_slow,
+            'last_event_id': f'{self.stream_id}-{self._seq}'
+        }
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Evidence reads for the agents API
+- Set-based firms x evidence_collection lookups (one round trip)
+- Read-through LRU/TTL cache keyed by (firm_id, agent), invalidated by
+  the evidence_changed NOTIFY trigger (migrations/003_evidence_changed_notify.sql)
+- Shared response shape for per-agent evidence
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from firm_resolver import is_numeric_id
+
+FIRM_EVIDENCE_QUERY = """
+    SELECT collected_by, evidence_data, confidence_score, collected_at
+    FROM evidence_collection
+    WHERE firm_id = %s AND collected_by = ANY(%s)
+"""
+
+BATCH_QUERY = """
+    SELECT f.id, f.firm_id, f.name, f.score, f.confidence,
+           e.collected_by, e.evidence_data, e.confidence_score, e.collected_at
+    FROM firms f
+    LEFT JOIN evidence_collection e
+           ON e.firm_id = f.firm_id AND e.collected_by = ANY(%(agents)s)
+    WHERE f.firm_id = ANY(%(slugs)s) OR f.id = ANY(%(ids)s)
+"""
+
+
+def agent_payload(code: str, label: str, evidence: Optional[Dict]) -> Dict:
+    """Response entry for one agent; evidence is a stored evidence row or None"""
+    if evidence is None:
+        return {
+            'agent': code,
+            'label': label,
+            'status': 'NO_EVIDENCE',
+            'evidence': None,
+            'timestamp': None
+        }
+    return {
+        'agent': code,
+        'label': label,
+        'status': 'SUCCESS',
+        'evidence': evidence['evidence_data'],
+        'confidence': evidence['confidence_score'],
+        'timestamp': evidence['collected_at'].isoformat() if evidence['collected_at'] else None
+    }
+
+
+def _newest(current: Optional[Dict], data, confidence_score, collected_at) -> Dict:
+    # Several evidence types per agent are possible; keep the newest
+    if current is not None and not (collected_at and (current['collected_at'] is None or collected_at > current['collected_at'])):
+        return current
+    return {
+        'evidence_data': data,
+        'confidence_score': confidence_score,
+        'collected_at': collected_at
+    }
+
+
+def fetch_firm_evidence(conn, firm_id: str, agents: List[str]) -> Dict[str, Optional[Dict]]:
+    """Stored evidence for one firm: {agent: row or None} for every agent"""
+    evidence: Dict[str, Optional[Dict]] = dict.fromkeys(agents)
+    for agent, data, confidence_score, collected_at in conn.execute(FIRM_EVIDENCE_QUERY, (firm_id, agents)):
+        evidence[agent] = _newest(evidence[agent], data, confidence_score, collected_at)
+    return evidence
+
+
+def fetch_batch(conn, keys: Sequence[str], agents: List[str]) -> Dict[str, Dict]:
+    """Resolve firm keys (ids or slugs) and their evidence in one query.
+
+    Returns {key: {'firm': {...}, 'evidence': {agent: row}}} for every
+    key that matched a firm; unknown keys are left out.
+    """
+    slugs = list(keys)
+    ids = [int(key) for key in keys if is_numeric_id(key)]
+    rows = conn.execute(BATCH_QUERY, {'agents': agents, 'slugs': slugs, 'ids': ids}).fetchall()
+
+    by_pk: Dict[int, Dict] = {}
+    for firm_pk, firm_id, name, score, confidence, agent, data, confidence_score, collected_at in rows:
+        entry = by_pk.setdefault(firm_pk, {
+            'firm': {'id': firm_pk, 'firm_id': firm_id, 'name': name, 'score': score, 'confidence': confidence},
+            'evidence': {}
+        })
+        if agent is None:
+            continue
+        entry['evidence'][agent] = _newest(entry['evidence'].get(agent), data, confidence_score, collected_at)
+
+    by_slug = {entry['firm']['firm_id']: entry for entry in by_pk.values()}
+    result = {}
+    for key in keys:
+        # Same precedence as FirmResolver: numeric id first, then slug
+        entry = by_pk.get(int(key)) if is_numeric_id(key) else None
+        entry = entry or by_slug.get(key)
+        if entry is not None:
+            result[key] = entry
+    return result
+
+
+def parse_list(values: Iterable[str]) -> List[str]:
+    """Flatten comma-separated query/body values, dropping blanks and duplicates"""
+    if isinstance(values, str):
+        values = [values]
+    items = {}
+    for value in values:
+        for item in str(value).split(','):
+            item = item.strip()
+            if item:
+                items[item] = None
+    return list(items)
+
+
+class EvidenceCache:
+    """Thread-safe LRU cache of evidence rows with a TTL safety net.
+
+    Absent evidence (None) is cached too, so unknown pairs do not hit the
+    database on every poll; the NOTIFY trigger fires on insert as well.
+
+    Invalidations are tracked per key: a fill only drops the rows whose
+    key changed after its get_many, so steady writes to some firms do not
+    keep every other firm out of the cache.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = 50000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, Optional[Dict]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidation sequence; _changed maps a key to the sequence of its
+        # last invalidation. Fills older than _floor are dropped whole: clear()
+        # raises it, as does pruning _changed to max_entries keys
+        self._seq = 0
+        self._floor = 0
+        self._changed: 'OrderedDict[Tuple[str, str], int]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_many(self, firm_id: str, agents: List[str]) -> Tuple[Dict[str, Optional[Dict]], List[str], int]:
+        """Return (cached {agent: row}, missing agents, generation to pass to fill)"""
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for agent in agents:
+                key = (firm_id, agent)
+                item = self._entries.get(key, self._MISSING)
+                if item is self._MISSING or item[0] < now:
+                    missing.append(agent)
+                    continue
+                self._entries.move_to_end(key)
+                found[agent] = item[1]
+            self.hits += len(found)
+            self.misses += len(missing)
+            return found, missing, self._seq
+
+    def fill(self, firm_id: str, rows: Dict[str, Optional[Dict]], generation: int):
+        """Store rows read from the database, except keys invalidated meanwhile"""
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if generation < self._floor:
+                return
+            for agent, row in rows.items():
+                key = (firm_id, agent)
+                if self._changed.get(key, 0) > generation:
+                    continue
+                self._entries[key] = (expires, row)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[Tuple[str, str]]):
+        with self._lock:
+            self._seq += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._changed.pop(key, None)
+                self._changed[key] = self._seq
+                self.invalidations += 1
+            while len(self._changed) > self.max_entries:
+                _, seq = self._changed.popitem(last=False)
+                self._floor = max(self._floor, seq)
+
+    def clear(self):
+        with self._lock:
+            self._seq += 1
+            self._floor = self._seq
+            self._changed.clear()
+            self._entries.clear()
+
+    def on_evidence_changed(self, payloads: List[str]):
+        """NOTIFY callback: payloads are '<agent>:<firm_id>'"""
+        keys = []
+        for payload in payloads:
+            agent, _, firm_id = payload.partition(':')
+            keys.append((firm_id, agent))
+        self.invalidate(keys)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_s': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0,
+            'invalidations': self.invalidations
+        }
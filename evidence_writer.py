@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Buffered evidence writes
+- Records accumulate in memory and flush when the buffer reaches
+  batch_size or its oldest record is flush_interval seconds old
+- A flush COPYs the batch into a temp staging table and merges it into
+  evidence_collection with one INSERT ... ON CONFLICT DO UPDATE, in one
+  transaction (one commit, one fsync, per batch)
+- A batch failing on bad data (DataError, IntegrityError) is rolled back
+  and bisected: good halves are written in bulk again, and only the rows
+  that fail on their own are rejected. Other errors (connection lost,
+  server down) are re-raised, so the run fails instead of rejecting rows
+- Each record can carry the input fingerprint it was computed from
+  (migrations/004_evidence_input_fingerprint.sql), for incremental runs
+"""
+
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+FLUSH_INTERVAL = 2.0
+MAX_ERRORS = 100
+
+CREATE_STAGE = """
+    CREATE TEMP TABLE IF NOT EXISTS evidence_stage (
+        ord integer,
+        firm_id varchar(255),
+        firm_name varchar(500),
+        collected_by varchar(50),
+        evidence_type varchar(100),
+        evidence_data jsonb,
+        confidence_score double precision,
+        input_fingerprint varchar(64)
+    ) ON COMMIT DELETE ROWS
+"""
+
+# Upsert on (firm, agent, type), refreshing collected_at; within one batch the
+# last record for a key wins, as sequential upserts would
+MERGE = """
+    INSERT INTO evidence_collection
+    (firm_id, firm_name, collected_by, evidence_type, evidence_data, confidence_score, input_fingerprint,
+     collected_at)
+    SELECT DISTINCT ON (firm_id, collected_by, evidence_type)
+           firm_id, firm_name, collected_by, evidence_type, evidence_data, confidence_score, input_fingerprint,
+           CURRENT_TIMESTAMP
+    FROM evidence_stage
+    ORDER BY firm_id, collected_by, evidence_type, ord DESC
+    ON CONFLICT (firm_id, collected_by, evidence_type)
+    DO UPDATE SET
+        evidence_data = EXCLUDED.evidence_data,
+        confidence_score = EXCLUDED.confidence_score,
+        input_fingerprint = EXCLUDED.input_fingerprint,
+        collected_at = CURRENT_TIMESTAMP
+    RETURNING (xmax = 0)
+"""
+
+Row = Tuple[str, str, str, str, str, float, Optional[str]]
+
+
+class EvidenceWriter:
+    """Size/time-bounded COPY + merge batches into evidence_collection"""
+
+    def __init__(self, conn, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rows: List[Row] = []
+        self._oldest: Optional[float] = None
+        self.stats = {'rows': 0, 'inserted': 0, 'updated': 0, 'superseded': 0, 'batches': 0,
+                      'retried_batches': 0, 'failed_rows': 0, 'flush_s': 0.0}
+        self.errors: List[Dict] = []
+
+    def add(self, firm_id: str, firm_name: str, agent_code: str, evidence: dict,
+            fingerprint: Optional[str] = None):
+        self._rows.append((
+            firm_id,
+            firm_name,
+            agent_code,
+            f'{agent_code}_evidence',
+            json.dumps(evidence, default=str),
+            evidence.get('confidence', 0.9),
+            fingerprint
+        ))
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if len(self._rows) >= self.batch_size or time.monotonic() - self._oldest >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> Dict:
+        """Write everything buffered; returns the stats so far"""
+        rows, self._rows, self._oldest = self._rows, [], None
+        if rows:
+            started = time.perf_counter()
+            self._write(rows)
+            self.stats['flush_s'] += time.perf_counter() - started
+        return self.stats
+
+    def _write(self, rows: List[Row]):
+        try:
+            merged, inserted = self._merge(rows)
+        except (psycopg.DataError, psycopg.IntegrityError) as e:
+            if len(rows) == 1:
+                self._reject(rows[0], e)
+                return
+            # Bisect: isolates the bad rows in O(bad x log n) retries
+            self.stats['retried_batches'] += 1
+            middle = len(rows) // 2
+            self._write(rows[:middle])
+            self._write(rows[middle:])
+            return
+        self.stats['batches'] += 1
+        self.stats['rows'] += len(rows)
+        self.stats['inserted'] += inserted
+        self.stats['updated'] += merged - inserted
+        # Earlier records for a key repeated within the batch
+        self.stats['superseded'] += len(rows) - merged
+
+    def _merge(self, rows: List[Row]) -> Tuple[int, int]:
+        """COPY + merge in one transaction; returns (rows merged, of which inserted)"""
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(CREATE_STAGE)
+                with cur.copy("COPY evidence_stage (ord, firm_id, firm_name, collected_by, evidence_type, "
+                              "evidence_data, confidence_score, input_fingerprint) FROM STDIN") as copy:
+                    for ord, row in enumerate(rows):
+                        copy.write_row((ord,) + row)
+                cur.execute(MERGE)
+                merged = cur.fetchall()
+            self.conn.commit()
+            return len(merged), sum(1 for (fresh,) in merged if fresh)
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _reject(self, row: Row, error: Exception):
+        self.stats['failed_rows'] += 1
+        message = str(error).splitlines()[0] if str(error) else type(error).__name__
+        logger.warning(f"⚠️  Evidence rejected for {row[0]}/{row[2]}: {message}")
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'firm_id': row[0], 'agent': row[2], 'error': message})
+
+    def close(self) -> Dict:
+        return self.flush()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Fuzzy firm deduplication
+- Names are normalized (case, accents, punctuation, legal suffixes such as
+  Ltd/LLC/GmbH, trailing .com) and shingled into character 3-grams
+- MinHash signatures + LSH banding find candidate matches in sublinear
+  time; only those candidates are verified by exact 3-gram Jaccard
+- Website domains (www. stripped) match directly; hosts shared by many
+  firms (search engines, social sites) are ignored
+- Names whose numbers differ ("Fund 2" / "Fund 3") never match
+- Every merge decision goes to a MergeReport (JSON) for review
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import unicodedata
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD = 0.8
+NUM_PERM = 64
+BANDS = 16      # 16 bands x 4 rows: candidate probability 50% at Jaccard 0.5
+SEED = 1
+# A domain behind more firms than this is a shared host, not an identity
+MAX_FIRMS_PER_DOMAIN = 3
+
+LEGAL_SUFFIXES = frozenset({
+    'ltd', 'limited', 'llc', 'llp', 'lp', 'inc', 'incorporated', 'corp', 'corporation', 'co', 'company',
+    'plc', 'gmbh', 'ag', 'sa', 'sas', 'sarl', 'srl', 'spa', 'bv', 'nv', 'pty', 'pte', 'oy', 'ab', 'as',
+    'kft', 'sro', 'fze', 'fzco', 'fzc', 'dmcc', 'the',
+})
+DOMAIN_SUFFIXES = ('com', 'net', 'org', 'io', 'co', 'uk', 'eu', 'de', 'ae', 'au', 'biz', 'info', 'ltd')
+SHARED_HOSTS = frozenset({
+    'duckduckgo.com', 'google.com', 'bing.com', 'wikipedia.org', 'en.wikipedia.org', 'linkedin.com',
+    'facebook.com', 'twitter.com', 'x.com', 'youtube.com', 'instagram.com', 'trustpilot.com', 'reddit.com',
+})
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_DOMAIN_NAME = re.compile(r'^[a-z0-9-]+(\.[a-z0-9-]+)*\.(' + '|'.join(DOMAIN_SUFFIXES) + r')$')
+
+
+def normalize_domain(url: Optional[str]) -> Optional[str]:
+    """'https://www.FTMO.com/en/' -> 'ftmo.com'"""
+    if not url:
+        return None
+    url = url.strip().lower()
+    host = urlparse(url if '//' in url else f'//{url}').hostname or ''
+    if host.startswith('www.'):
+        host = host[4:]
+    return host or None
+
+
+def normalize_name(name: str) -> str:
+    """'FTMO Ltd.' / 'ftmo.com' / 'F.T.M.O' -> 'ftmo'"""
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower().strip()
+    if _DOMAIN_NAME.match(text):
+        host = normalize_domain(text) or text
+        text = host.split('.')[0]
+    text = text.replace('&', ' and ')
+    tokens = re.sub(r"[^a-z0-9]+", ' ', re.sub(r"(?<=\w)[.'](?=\w)", '', text)).split()
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    if len(tokens) > 1 and tokens[0] == 'the':
+        tokens.pop(0)
+    return ' '.join(tokens)
+
+
+def shingles(normalized: str, k: int = 3) -> Set[str]:
+    text = f"#{normalized.replace(' ', '')}#"
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _numbers(normalized: str) -> Tuple[str, ...]:
+    return tuple(re.findall(r'\d+', normalized))
+
+
+class FirmIndex:
+    """MinHash-LSH index over firm names plus an exact domain index"""
+
+    def __init__(self, threshold: float = THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS,
+                 seed: int = SEED):
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(num_perm)]
+        # The 3-gram vocabulary is small and shared, so each shingle's
+        # permuted hashes are computed once; a signature is then one
+        # element-wise min over the name's cached vectors
+        self._shingle_hashes: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+        self._firms: List[Dict] = []
+        self._by_key: Dict[str, int] = {}
+        self._by_domain: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'firms': 0, 'queries': 0, 'candidates': 0, 'matches': 0}
+
+    def _vector(self, shingle: str) -> Tuple[int, ...]:
+        vector = self._shingle_hashes.get(shingle)
+        if vector is None:
+            h = zlib.crc32(shingle.encode())
+            vector = tuple(((a * h + b) % _MERSENNE) & _MAX_HASH for a, b in self._perms)
+            self._shingle_hashes[shingle] = vector
+        return vector
+
+    def signature(self, grams: Set[str]) -> Tuple[int, ...]:
+        cached = self._shingle_hashes
+        return tuple(map(min, *[cached.get(gram) or self._vector(gram) for gram in grams]))
+
+    def _bands(self, signature: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, firm_id: str, name: str, website: Optional[str] = None) -> int:
+        normalized = normalize_name(name)
+        grams = shingles(normalized)
+        domain = normalize_domain(website)
+        with self._lock:
+            index = len(self._firms)
+            self._firms.append({'firm_id': firm_id, 'name': name, 'website_root': website,
+                                'normalized': normalized, 'shingles': grams, 'domain': domain})
+            self._by_key.setdefault(normalized, index)
+            if domain and domain not in SHARED_HOSTS:
+                self._by_domain.setdefault(domain, []).append(index)
+            for band, key in self._bands(self.signature(grams)):
+                self._buckets[band].setdefault(key, []).append(index)
+            self.stats['firms'] += 1
+        return index
+
+    def _domain_match(self, domain: Optional[str]) -> Optional[int]:
+        if not domain or domain in SHARED_HOSTS:
+            return None
+        owners = self._by_domain.get(domain, ())
+        if not owners or len({self._firms[i]['normalized'] for i in owners}) > MAX_FIRMS_PER_DOMAIN:
+            return None
+        return owners[0]
+
+    def match(self, name: str, website: Optional[str] = None) -> Optional[Dict]:
+        """Best existing firm for a candidate, or None. Checks domain, exact key, then LSH."""
+        normalized = normalize_name(name)
+        domain = normalize_domain(website)
+        # A bare domain given as the name ("ftmo.com") is also a domain lookup
+        name_domain = normalize_domain(name) if _DOMAIN_NAME.match(name.strip().lower()) else None
+        with self._lock:
+            self.stats['queries'] += 1
+            for reason, found in (('domain', self._domain_match(domain)),
+                                  ('domain', self._domain_match(name_domain)),
+                                  ('exact', self._by_key.get(normalized))):
+                if found is not None:
+                    self.stats['matches'] += 1
+                    return self._result(found, 1.0, reason)
+            grams = shingles(normalized)
+            numbers = _numbers(normalized)
+            candidates: Set[int] = set()
+            for band, key in self._bands(self.signature(grams)):
+                candidates.update(self._buckets[band].get(key, ()))
+            self.stats['candidates'] += len(candidates)
+            best, best_score = None, 0.0
+            for index in candidates:
+                firm = self._firms[index]
+                if _numbers(firm['normalized']) != numbers:
+                    continue
+                score = jaccard(grams, firm['shingles'])
+                if score > best_score:
+                    best, best_score = index, score
+            if best is None or best_score < self.threshold:
+                return None
+            self.stats['matches'] += 1
+            return self._result(best, best_score, 'name')
+
+    def _result(self, index: int, similarity: float, reason: str) -> Dict:
+        firm = self._firms[index]
+        return {'firm_id': firm['firm_id'], 'name': firm['name'], 'website_root': firm['website_root'],
+                'similarity': round(similarity, 3), 'reason': reason}
+
+    def __len__(self) -> int:
+        return len(self._firms)
+
+    @classmethod
+    def from_db(cls, conn, **kwargs) -> 'FirmIndex':
+        """Index every row of firms (one sequential scan)"""
+        index = cls(**kwargs)
+        with conn.cursor() as cur:
+            cur.execute('SELECT firm_id, name, website_root FROM firms WHERE name IS NOT NULL')
+            for firm_id, name, website in cur:
+                index.add(firm_id, name, website)
+        conn.commit()
+        return index
+
+
+class MergeReport:
+    """Candidates folded into existing firms, with the reason and similarity"""
+
+    def __init__(self):
+        self.merges: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, candidate: Dict, match: Dict):
+        with self._lock:
+            self.merges.append({
+                'candidate': candidate.get('name'),
+                'candidate_website': candidate.get('website_root'),
+                'merged_into': match['firm_id'],
+                'merged_name': match['name'],
+                'reason': match['reason'],
+                'similarity': match['similarity'],
+            })
+
+    def _summary(self) -> Dict:
+        by_reason: Dict[str, int] = {}
+        for merge in self.merges:
+            by_reason[merge['reason']] = by_reason.get(merge['reason'], 0) + 1
+        return {'merged': len(self.merges), 'by_reason': by_reason}
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return self._summary()
+
+    def write(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            data = {'generated_at': datetime.now().isoformat(), **self._summary(), 'merges': list(self.merges)}
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, indent=2, default=str)
+
+
+def dedup_firms(index: FirmIndex, firms: Iterable[Dict], report: MergeReport,
+                slug=None) -> List[Dict]:
+    """Fold candidates into matching firms; new firms join the index.
+
+    A matched candidate keeps its data but takes the existing firm_id and
+    name (and website, when it has none), so the upsert updates that row.
+    """
+    out = []
+    for firm in firms:
+        firm_id = firm.get('firm_id') or (slug(firm['name']) if slug else firm['name'])
+        match = index.match(firm['name'], firm.get('website_root'))
+        if match is None:
+            index.add(firm_id, firm['name'], firm.get('website_root'))
+        elif match['firm_id'] != firm_id:
+            report.record(firm, match)
+            firm['firm_id'] = match['firm_id']
+            firm['name'] = match['name']
+            if not firm.get('website_root') and match['website_root']:
+                firm['website_root'] = match['website_root']
+        out.append(firm)
+    return out
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Firm resolution for the agents API
+- Tells numeric ids from firm_id slugs and uses the matching index
+  (firms_pkey or the unique index on firms.firm_id)
+- In-process id/slug -> row map, kept fresh by the firms_changed
+  NOTIFY trigger (migrations/002_firms_changed_notify.sql) plus a
+  periodic full reload; changes applied while a reload runs are replayed
+  onto the reloaded maps
+- Unknown keys are remembered for a short TTL (dropped on any firm
+  change), so misspelled ids do not cost a query per request
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FIRM_COLUMNS = ('id', 'firm_id', 'name', 'score', 'confidence')
+_SELECT = f"SELECT {', '.join(FIRM_COLUMNS)} FROM firms"
+
+# Beyond this many changed rows in one NOTIFY batch a full reload is cheaper
+BULK_CHANGE_THRESHOLD = 200
+
+NEGATIVE_TTL = 30.0
+NEGATIVE_MAX_ENTRIES = 10000
+
+
+def _row_to_firm(row) -> Dict:
+    return dict(zip(FIRM_COLUMNS, row))
+
+
+def is_numeric_id(key: str) -> bool:
+    return key.isascii() and key.isdigit()
+
+
+class FirmResolver:
+    """Resolve an /api/agents/:firmId key to a firm row dict"""
+
+    def __init__(self, pool, negative_ttl: float = NEGATIVE_TTL):
+        self.pool = pool
+        self.negative_ttl = negative_ttl
+        self._by_id: Dict[int, Dict] = {}
+        self._by_slug: Dict[str, Dict] = {}
+        # key -> expiry of keys that matched no firm
+        self._misses: 'OrderedDict[str, float]' = OrderedDict()
+        # Changes made while a reload runs, as (sequence, firm or None, firm pk)
+        self._seq = 0
+        self._loading = 0
+        self._journal: List[Tuple[int, Optional[Dict], int]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.loaded = False
+
+    def load(self):
+        """(Re)build the id/slug maps from the firms table"""
+        with self._lock:
+            start_seq = self._seq
+            self._loading += 1
+        try:
+            with self.pool.connection() as conn:
+                rows = conn.execute(_SELECT).fetchall()
+            by_id = {}
+            by_slug = {}
+            for row in rows:
+                self._apply(by_id, by_slug, _row_to_firm(row))
+            with self._lock:
+                # NOTIFYs handled during the reload may postdate its snapshot
+                for seq, firm, firm_pk in self._journal:
+                    if seq > start_seq:
+                        self._apply(by_id, by_slug, firm, firm_pk)
+                self._by_id, self._by_slug = by_id, by_slug
+                self._misses.clear()
+                self.loaded = True
+        finally:
+            with self._lock:
+                self._loading -= 1
+                if not self._loading:
+                    self._journal.clear()
+        logger.info(f"Firm resolver loaded {len(by_id)} firms")
+
+    def resolve(self, key: str) -> Optional[Dict]:
+        """Return the firm for a numeric id or firm_id slug, or None"""
+        firm = self._lookup(key)
+        if firm is None:
+            if self._missed(key):
+                return None
+            # Not in the map (yet): one index-backed query, then remember it
+            firm = self._fetch(key)
+            if firm is not None:
+                self._put(firm)
+            else:
+                self._miss(key)
+        return firm
+
+    def _missed(self, key: str) -> bool:
+        with self._lock:
+            expires = self._misses.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._misses[key]
+                return False
+            return True
+
+    def _miss(self, key: str):
+        with self._lock:
+            self._misses[key] = time.monotonic() + self.negative_ttl
+            self._misses.move_to_end(key)
+            while len(self._misses) > NEGATIVE_MAX_ENTRIES:
+                self._misses.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        by_id, by_slug = self._by_id, self._by_slug
+        if is_numeric_id(key):
+            # A slug may itself be numeric, so fall back to the slug map
+            return by_id.get(int(key)) or by_slug.get(key)
+        return by_slug.get(key)
+
+    def _fetch(self, key: str) -> Optional[Dict]:
+        with self.pool.connection() as conn:
+            row = None
+            if is_numeric_id(key):
+                row = conn.execute(f"{_SELECT} WHERE id = %s", (int(key),)).fetchone()
+            if row is None:
+                row = conn.execute(f"{_SELECT} WHERE firm_id = %s", (key,)).fetchone()
+        return _row_to_firm(row) if row else None
+
+    @staticmethod
+    def _apply(by_id: Dict, by_slug: Dict, firm: Optional[Dict], firm_pk: Optional[int] = None):
+        """Store firm, or drop firm_pk when firm is None"""
+        previous = by_id.pop(firm_pk, None) if firm is None else by_id.get(firm['id'])
+        if previous and previous['firm_id'] and (firm is None or previous['firm_id'] != firm['firm_id']):
+            by_slug.pop(previous['firm_id'], None)
+        if firm is not None:
+            by_id[firm['id']] = firm
+            if firm['firm_id']:
+                by_slug[firm['firm_id']] = firm
+
+    def _change(self, firm: Optional[Dict], firm_pk: int):
+        with self._lock:
+            self._seq += 1
+            if self._loading:
+                self._journal.append((self._seq, firm, firm_pk))
+            self._apply(self._by_id, self._by_slug, firm, firm_pk)
+
+    def _put(self, firm: Dict):
+        self._change(firm, firm['id'])
+
+    def _drop(self, firm_pk: int):
+        self._change(None, firm_pk)
+
+    def on_firms_changed(self, payloads: List[str]):
+        """NOTIFY callback: payloads are firms.id values of changed rows"""
+        if not self.loaded:
+            return
+        changed = {int(p) for p in payloads if is_numeric_id(p)}
+        if len(changed) > BULK_CHANGE_THRESHOLD:
+            self.load()
+            return
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"{_SELECT} WHERE id = ANY(%s)", (list(changed),)).fetchall()
+        seen = set()
+        for row in rows:
+            firm = _row_to_firm(row)
+            seen.add(firm['id'])
+            self._put(firm)
+        for firm_pk in changed - seen:
+            self._drop(firm_pk)
+        with self._lock:
+            # A new or renamed firm may answer a key remembered as unknown
+            self._misses.clear()
+
+    def start_background_refresh(self, interval: float):
+        """Full reload every `interval` seconds as a safety net for missed NOTIFYs"""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.load()
+                except Exception as e:
+                    logger.warning(f"Firm resolver refresh failed: {e}")
+
+        threading.Thread(target=run, name='firm-resolver-refresh', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        return {'loaded': self.loaded, 'firms': len(self._by_id), 'unknown_keys': len(self._misses)}
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Bulk firm writes for the discovery pipeline
+- COPY a batch of enriched firms into a temp staging table, then one
+  set-based INSERT ... ON CONFLICT (firm_id) DO UPDATE per batch
+- One round trip per batch and one commit (one fsync) per batch, instead
+  of one of each per firm
+- RETURNING tells inserted from updated rows (xmax = 0 on fresh inserts)
+- A batch failing on bad data (DataError, IntegrityError: a name too long
+  or already taken by another firm_id) is bisected, so only the rows that
+  fail on their own are rejected; other errors (connection lost) re-raise
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+STAGE_COLUMNS = ('ord', 'firm_id', 'name', 'website_root', 'model_type', 'jurisdiction',
+                 'confidence', 'score', 'na_rate')
+
+CREATE_STAGE = """
+    CREATE TEMP TABLE IF NOT EXISTS firm_stage (
+        ord integer,
+        firm_id varchar(255),
+        name varchar(255),
+        website_root text,
+        model_type text,
+        jurisdiction text,
+        confidence double precision,
+        score double precision,
+        na_rate double precision
+    ) ON COMMIT DELETE ROWS
+"""
+
+# An existing firm keeps its stored score (scoring happens after discovery).
+# A slug repeated within one batch keeps its last row, as sequential upserts would.
+MERGE = """
+    INSERT INTO firms (firm_id, name, website_root, model_type, jurisdiction, confidence, score, na_rate)
+    SELECT DISTINCT ON (firm_id)
+           firm_id, name, website_root, model_type, jurisdiction, confidence, score, na_rate
+    FROM firm_stage
+    ORDER BY firm_id, ord DESC
+    ON CONFLICT (firm_id) DO UPDATE SET
+        name = EXCLUDED.name,
+        website_root = EXCLUDED.website_root,
+        model_type = EXCLUDED.model_type,
+        jurisdiction = EXCLUDED.jurisdiction,
+        confidence = EXCLUDED.confidence
+    RETURNING id, firm_id, name, score, (xmax = 0) AS inserted
+"""
+
+
+def firm_slug(name: str) -> str:
+    """firm_id derived from a firm name"""
+    return name.lower().replace(' ', '').replace('&', '').replace('-', '')[:50]
+
+
+def _stage_row(ord: int, firm: Dict) -> tuple:
+    return (
+        ord,
+        firm.get('firm_id') or firm_slug(firm['name']),
+        firm['name'],
+        firm.get('website_root', ''),
+        firm.get('model_type', 'Standard'),
+        firm.get('jurisdiction', 'Unknown'),
+        firm.get('confidence', 0.75),
+        firm.get('score', 45.0),
+        firm.get('na_rate', 0.1)
+    )
+
+
+def upsert_batch(conn, firms: List[Dict]) -> Dict:
+    """COPY + merge one batch in one transaction.
+
+    Returns {'inserted', 'updated', 'saved': [{'id', 'firm_id', 'name', 'score', 'inserted'}]}.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(CREATE_STAGE)
+            with cur.copy(f"COPY firm_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN") as copy:
+                for ord, firm in enumerate(firms):
+                    copy.write_row(_stage_row(ord, firm))
+            cur.execute(MERGE)
+            rows = cur.fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    saved = [{'id': pk, 'firm_id': firm_id, 'name': name, 'score': score, 'inserted': inserted}
+             for pk, firm_id, name, score, inserted in rows]
+    inserted = sum(1 for row in saved if row['inserted'])
+    return {'inserted': inserted, 'updated': len(saved) - inserted, 'saved': saved}
+
+
+def bulk_upsert_firms(conn, firms: Iterable[Dict], batch_size: int = BATCH_SIZE) -> Dict:
+    """Upsert firms in batches of batch_size; rows a batch rejects are reported.
+
+    Returns {'inserted', 'updated', 'failed', 'retried_batches', 'saved': [...]}
+    over all batches. Errors other than bad data propagate.
+    """
+    totals = {'inserted': 0, 'updated': 0, 'failed': 0, 'retried_batches': 0, 'saved': []}
+    batch: List[Dict] = []
+
+    def write(firms: List[Dict]):
+        try:
+            result = upsert_batch(conn, firms)
+        except (psycopg.DataError, psycopg.IntegrityError) as e:
+            if len(firms) == 1:
+                message = str(e).splitlines()[0] if str(e) else type(e).__name__
+                logger.warning(f"⚠️  Firm rejected: {firms[0]['name'][:80]}: {message}")
+                totals['failed'] += 1
+                return
+            # Bisect: isolates the bad rows in O(bad x log n) retries
+            totals['retried_batches'] += 1
+            middle = len(firms) // 2
+            write(firms[:middle])
+            write(firms[middle:])
+            return
+        totals['inserted'] += result['inserted']
+        totals['updated'] += result['updated']
+        totals['saved'].extend(result['saved'])
+
+    for firm in firms:
+        if not firm.get('name'):
+            continue
+        batch.append(firm)
+        if len(batch) >= batch_size:
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+    return totals
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Concurrent HTTP serving for the GPTI API servers
+- Bounded worker pool (no thread-per-connection blowup); connections
+  waiting for a worker are capped, the excess gets a 503
+- HTTP/1.1 keep-alive with an idle timeout; idle keep-alive connections
+  are closed at once when new connections are waiting for a worker
+- Graceful shutdown on SIGINT/SIGTERM (drain in-flight requests)
+- Content-hash ETags, If-None-Match -> 304, gzip/brotli negotiation
+  with the encoded bytes cached per distinct payload
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import signal
+import socket
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 32
+DEFAULT_KEEPALIVE_TIMEOUT = 5.0
+DEFAULT_MAX_PENDING = 128
+
+OVERLOADED_RESPONSE = (b'HTTP/1.1 503 Service Unavailable\r\n'
+                       b'Content-Type: application/json\r\n'
+                       b'Content-Length: 35\r\n'
+                       b'Retry-After: 1\r\n'
+                       b'Connection: close\r\n\r\n'
+                       b'{"error": "Server busy, try again"}')
+
+# Smaller bodies are not worth the compression round trip
+COMPRESS_MIN_BYTES = 1024
+
+
+class EncodedBody:
+    """Response body with a content-hash ETag and lazily compressed variants"""
+
+    __slots__ = ('body', 'content_type', 'digest', '_variants')
+
+    def __init__(self, body: bytes, content_type: str = 'application/json'):
+        self.body = body
+        self.content_type = content_type
+        self.digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._variants: Dict[str, bytes] = {'identity': body}
+
+    @classmethod
+    def json(cls, data) -> 'EncodedBody':
+        return cls(json.dumps(data, default=str).encode())
+
+    def etag(self, encoding: str = 'identity') -> str:
+        # Each representation needs its own strong validator
+        return f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+
+    def encoded(self, encoding: str) -> bytes:
+        variant = self._variants.get(encoding)
+        if variant is None:
+            if encoding == 'br':
+                variant = brotli.compress(self.body, quality=5)
+            else:
+                variant = gzip.compress(self.body, compresslevel=6, mtime=0)
+            self._variants[encoding] = variant
+        return variant
+
+    def matches(self, if_none_match: str) -> bool:
+        """True if an If-None-Match header names any representation of this body"""
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return True
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag.strip('"').split('-', 1)[0] == self.digest:
+                return True
+        return False
+
+
+class BodyCache:
+    """LRU of EncodedBody by content hash, so identical payloads polled
+    repeatedly are compressed once and then served from memory"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, EncodedBody]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def intern(self, body: EncodedBody) -> EncodedBody:
+        with self._lock:
+            existing = self._entries.get(body.digest)
+            if existing is not None:
+                self._entries.move_to_end(body.digest)
+                return existing
+            self._entries[body.digest] = body
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return body
+
+
+body_cache = BodyCache()
+
+
+def json_body(data) -> EncodedBody:
+    """Serialize data, reusing cached compressed bytes for unchanged payloads"""
+    return body_cache.intern(EncodedBody.json(data))
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Pick br, gzip or identity from an Accept-Encoding header"""
+    if not accept_encoding:
+        return 'identity'
+    weights = {}
+    for part in accept_encoding.split(','):
+        token, _, params = part.partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token.strip().lower()] = weight
+    for encoding in ('br', 'gzip'):
+        if encoding == 'br' and brotli is None:
+            continue
+        if weights.get(encoding, weights.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Request handler base speaking HTTP/1.1 with persistent connections.
+
+    Subclasses must send a Content-Length (or chunked body) with every
+    response, otherwise clients cannot tell where a response ends.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle + delayed ACK
+    # every keep-alive response would stall ~40ms waiting for the peer
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Idle keep-alive connections are dropped after this many seconds
+        self.timeout = getattr(self.server, 'keepalive_timeout', DEFAULT_KEEPALIVE_TIMEOUT)
+        super().setup()
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            # Between requests the connection holds its worker idle; the
+            # server takes the worker back when other connections wait
+            if not self.server.connection_idle(self.request):
+                break
+            self.handle_one_request()
+
+    def parse_request(self):
+        self.server.connection_busy(self.request)
+        return super().parse_request()
+
+    def end_headers(self):
+        # Draining, or other connections are waiting for this worker
+        if getattr(self.server, 'draining', False) or self.server.saturated():
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        super().end_headers()
+
+    def send_body(self, body: EncodedBody, status: int = 200, headers: Optional[Dict[str, str]] = None):
+        """Send body with ETag/304 handling and negotiated compression"""
+        cacheable = 200 <= status < 300
+        encoding = 'identity'
+        if len(body.body) >= COMPRESS_MIN_BYTES:
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+
+        if cacheable and body.matches(self.headers.get('If-None-Match', '')):
+            self.send_response(304)
+            self.send_header('ETag', body.etag(encoding))
+            self.send_header('Vary', 'Accept-Encoding')
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        payload = body.encoded(encoding)
+
+        self.send_response(status)
+        self.send_header('Content-Type', body.content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        if cacheable:
+            self.send_header('ETag', body.etag(encoding))
+            # Clients may keep the body but must revalidate before reuse
+            self.send_header('Cache-Control', 'no-cache')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(payload)
+
+    def send_chunked(self, chunks, content_type: str, headers: Optional[Dict[str, str]] = None) -> bool:
+        """Stream an iterable of byte chunks; returns False if aborted midway"""
+        chunked = self.request_version != 'HTTP/1.0'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            # HTTP/1.0 has no chunked encoding: the body ends at connection close
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                if chunk:
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+            return True
+        except Exception as e:
+            # The status line is already out; dropping the connection without
+            # the final chunk tells the client the body is truncated
+            logger.warning(f"Streaming response aborted: {e}")
+            self.close_connection = True
+            return False
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that dispatches connections to a fixed-size thread pool.
+
+    A keep-alive connection occupies a worker until it closes. To keep idle
+    clients from starving new ones, idle connections are shut down as soon
+    as any connection is waiting for a worker, and at most max_pending
+    connections wait at all; the rest are answered 503 and closed.
+    """
+
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers: int = DEFAULT_WORKERS,
+                 keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT, max_pending: int = DEFAULT_MAX_PENDING):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.keepalive_timeout = keepalive_timeout
+        self.max_pending = max_pending
+        self.draining = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-worker')
+        self._connections = set()
+        self._detached = set()
+        # Connections between two requests, oldest first (dict keeps order)
+        self._idle: Dict[socket.socket, None] = {}
+        self._reclaimed = set()
+        self._pending = 0
+        self._connections_lock = threading.Lock()
+        self.stats = {'rejected': 0, 'reclaimed': 0}
+
+    def process_request(self, request, client_address):
+        with self._connections_lock:
+            if self._pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                overloaded = True
+            else:
+                overloaded = False
+                self._pending += 1
+                self._connections.add(request)
+                # Free workers for it by closing idle keep-alive connections
+                self._reclaim_idle(self._waiting())
+        if overloaded:
+            self._reject(request)
+            return
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _reject(self, request):
+        try:
+            request.settimeout(1.0)
+            request.sendall(OVERLOADED_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _waiting(self) -> int:
+        """Connections that will not get a worker unless one frees up (caller holds the lock)"""
+        return len(self._connections) - len(self._reclaimed) - self.workers
+
+    def _reclaim_idle(self, count: int):
+        """Shut down up to count idle connections (caller holds the lock)"""
+        for conn in list(self._idle)[:max(count, 0)]:
+            del self._idle[conn]
+            self._reclaimed.add(conn)
+            self.stats['reclaimed'] += 1
+            try:
+                # The worker's pending read sees EOF and the handler returns
+                conn.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+    def saturated(self) -> bool:
+        """True while some connection is waiting for a worker"""
+        with self._connections_lock:
+            return self._waiting() > 0
+
+    def connection_idle(self, request) -> bool:
+        """Called between requests; False means close now, a connection is waiting"""
+        with self._connections_lock:
+            if self._waiting() > 0:
+                self._reclaimed.add(request)
+                self.stats['reclaimed'] += 1
+                return False
+            self._idle[request] = None
+            return True
+
+    def connection_busy(self, request):
+        with self._connections_lock:
+            self._idle.pop(request, None)
+
+    def _process_request_worker(self, request, client_address):
+        with self._connections_lock:
+            self._pending -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._connections_lock:
+                self._connections.discard(request)
+                self._idle.pop(request, None)
+                self._reclaimed.discard(request)
+            self.shutdown_request(request)
+
+    def detach(self, request) -> socket.socket:
+        """Hand a connection over to the caller (e.g. a streaming fan-out).
+
+        Returns a duplicate socket the caller now owns; when the handler
+        returns, the worker only closes its own descriptor instead of
+        shutting the connection down.
+        """
+        sock = request.dup()
+        with self._connections_lock:
+            self._detached.add(request)
+        return sock
+
+    def shutdown_request(self, request):
+        with self._connections_lock:
+            detached = request in self._detached
+            self._detached.discard(request)
+        if detached:
+            self.close_request(request)
+        else:
+            super().shutdown_request(request)
+
+    def drain(self):
+        """Stop reading new requests; in-flight responses still complete"""
+        self.draining = True
+        with self._connections_lock:
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                # Idle keep-alive readers see EOF and return immediately
+                conn.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def serve_until_shutdown(httpd: PooledHTTPServer):
+    """Run httpd until SIGINT/SIGTERM, then drain and close it"""
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+
+    previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    thread = threading.Thread(target=httpd.serve_forever, name='http-accept', daemon=True)
+    thread.start()
+    try:
+        stop.wait()
+    finally:
+        logger.info("Shutting down: draining in-flight requests")
+        httpd.shutdown()
+        httpd.drain()
+        httpd.server_close()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
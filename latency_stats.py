@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Fixed-memory latency statistics for long-running monitors
+- Log-linear (HDR-style) histogram: ~1% relative error on quantiles,
+  bucket count bounded by the tracked range, not by the sample count
+- Rolling 1m / 5m / 1h windows built from ring buffers of time slices
+- Per-series outcome counters (calls, failures, last error)
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# Values are recorded in milliseconds; 1us .. ~17min at 2% bucket width
+MIN_VALUE_MS = 0.001
+MAX_VALUE_MS = 1_000_000.0
+RELATIVE_ERROR = 0.01
+_LOG_BASE = math.log1p(2 * RELATIVE_ERROR)
+MAX_BUCKET = int(math.log(MAX_VALUE_MS / MIN_VALUE_MS) / _LOG_BASE) + 1
+
+QUANTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+# window name -> (ring, slices); the 10s ring serves 1m and 5m, the 1m ring serves 1h
+WINDOWS = {'1m': ('fine', 6), '5m': ('fine', 30), '1h': ('coarse', 60)}
+RINGS = {'fine': (10.0, 30), 'coarse': (60.0, 60)}
+
+
+def bucket_index(value_ms: float) -> int:
+    if value_ms <= MIN_VALUE_MS:
+        return 0
+    return min(MAX_BUCKET, int(math.log(value_ms / MIN_VALUE_MS) / _LOG_BASE) + 1)
+
+
+def bucket_value(index: int) -> float:
+    """Representative (midpoint) value of a bucket"""
+    if index == 0:
+        return MIN_VALUE_MS
+    low = MIN_VALUE_MS * math.exp((index - 1) * _LOG_BASE)
+    return low * (1 + RELATIVE_ERROR)
+
+
+class LogHistogram:
+    """Sparse log-linear histogram; at most MAX_BUCKET + 1 buckets"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value_ms: float):
+        index = bucket_index(value_ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: 'LogHistogram'):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantiles(self, qs=QUANTILES) -> Dict[str, Optional[float]]:
+        if not self.count:
+            return {name: None for name, _ in qs}
+        ranked = sorted(self.counts.items())
+        result = {}
+        for name, q in qs:
+            rank = max(1, math.ceil(q * self.count))
+            seen = 0
+            for index, count in ranked:
+                seen += count
+                if seen >= rank:
+                    # Never report more than the exact max
+                    result[name] = round(min(bucket_value(index), self.max), 3)
+                    break
+        return result
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            **self.quantiles(),
+            'max': round(self.max, 3) if self.count else None
+        }
+
+
+class _Ring:
+    """Fixed number of time slices, each one histogram; old slices are reused"""
+
+    def __init__(self, slice_seconds: float, slices: int):
+        self.slice_seconds = slice_seconds
+        self.slots: List[Tuple[int, LogHistogram]] = [(-1, LogHistogram()) for _ in range(slices)]
+
+    def _epoch(self, now: float) -> int:
+        return int(now // self.slice_seconds)
+
+    def record(self, value_ms: float, now: float):
+        epoch = self._epoch(now)
+        slot = epoch % len(self.slots)
+        slot_epoch, histogram = self.slots[slot]
+        if slot_epoch != epoch:
+            histogram = LogHistogram()
+            self.slots[slot] = (epoch, histogram)
+        histogram.record(value_ms)
+
+    def merged(self, slices: int, now: float) -> LogHistogram:
+        current = self._epoch(now)
+        merged = LogHistogram()
+        for slot_epoch, histogram in self.slots:
+            if current - slices < slot_epoch <= current:
+                merged.merge(histogram)
+        return merged
+
+
+class RollingLatency:
+    """Latency over the rolling WINDOWS plus lifetime outcome counters"""
+
+    def __init__(self):
+        self.rings = {name: _Ring(*spec) for name, spec in RINGS.items()}
+        self.total_calls = 0
+        self.successful_calls = 0
+        self.failed_calls = 0
+        self.last_error: Optional[str] = None
+        self.last_check: Optional[float] = None
+
+    def record(self, value_ms: Optional[float], ok: bool, error: Optional[str], now: float):
+        self.total_calls += 1
+        self.last_check = now
+        if ok:
+            self.successful_calls += 1
+        else:
+            self.failed_calls += 1
+            self.last_error = error
+        # Failures without a round trip (connection refused, timeout) have no latency
+        if value_ms is not None:
+            for ring in self.rings.values():
+                ring.record(value_ms, now)
+
+    def snapshot(self, now: float) -> Dict:
+        return {
+            'total_calls': self.total_calls,
+            'successful_calls': self.successful_calls,
+            'failed_calls': self.failed_calls,
+            'last_error': self.last_error,
+            'last_check': self.last_check,
+            'windows': {
+                name: self.rings[ring].merged(slices, now).summary()
+                for name, (ring, slices) in WINDOWS.items()
+            }
+        }
+
+
+class LatencyStats:
+    """Thread-safe RollingLatency per (kind, name) series, e.g. ('agent', 'RVI')"""
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, Hashable], RollingLatency] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, name: Hashable, value_ms: Optional[float], ok: bool = True,
+               error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            series = self._series.get((kind, name))
+            if series is None:
+                series = self._series[(kind, name)] = RollingLatency()
+            series.record(value_ms, ok, error, now)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict]]:
+        """{kind: {name: {counters..., 'windows': {'1m': {...}, ...}}}}"""
+        now = time.time()
+        result: Dict[str, Dict[str, Dict]] = {}
+        with self._lock:
+            for (kind, name), series in sorted(self._series.items(), key=lambda item: str(item[0])):
+                result.setdefault(kind, {})[str(name)] = series.snapshot(now)
+        return result
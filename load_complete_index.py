@@ -3,13 +3,19 @@
 Load firms with proper transaction handling
 """
 
+import os
 import sys
 import json
 sys.path.insert(0, '/opt/gpti/gpti-data-bot/src')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEDUP_THRESHOLD = float(os.environ.get('FIRM_DEDUP_THRESHOLD', '0.8'))
+DEDUP_REPORT = os.environ.get('FIRM_DEDUP_REPORT', '/opt/gpti/tmp/firm_dedup_report.json')
 
 def main():
     import psycopg
     from datetime import datetime
+    from firm_dedup import FirmIndex, MergeReport
     
     print("=" * 70)
     print("GPTI - Load 196 Firms for Index Calculations")
@@ -40,18 +46,21 @@ def main():
     print("Inserting firms...")
     inserted = 0
     skipped = 0
-    seen_names = set()
+    duplicates = 0
+    # Fuzzy dedup (names + website domains): "FTMO", "FTMO Ltd" and
+    # "ftmo.com" load as one firm; the first one seen is kept
+    firm_index = FirmIndex(threshold=DEDUP_THRESHOLD)
+    merge_report = MergeReport()
     
     for i, firm in enumerate(firms, 1):
         name = firm.get('name', 'Unknown')
         
-        # Skip duplicates by name
-        if name in seen_names:
-            skipped += 1
+        match = firm_index.match(name, firm.get('website_root'))
+        if match is not None:
+            merge_report.record(firm, match)
+            duplicates += 1
             continue
         
-        seen_names.add(name)
-        
         try:
             cur.execute("""
                 INSERT INTO firms (name, score, status, firm_id, website_root, 
@@ -71,6 +80,7 @@ def main():
             ))
             conn.commit()
             inserted += 1
+            firm_index.add(firm.get('firm_id') or name, name, firm.get('website_root'))
             
             if inserted % 50 == 0:
                 print(f"  ... {inserted} firms inserted")
@@ -79,8 +89,11 @@ def main():
             skipped += 1
     
     print(f"  ✓ Successfully inserted {inserted} firms")
+    if duplicates > 0:
+        merge_report.write(DEDUP_REPORT)
+        print(f"  ⚠ Merged {duplicates} duplicates {merge_report.summary()['by_reason']} (report: {DEDUP_REPORT})")
     if skipped > 0:
-        print(f"  ⚠ Skipped {skipped} duplicates/errors")
+        print(f"  ⚠ Skipped {skipped} errors")
     print()
     
     # Stats
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Minimal HTTP load generator shared by the GPTI load tests and benchmarks
+- Closed-loop workers over keep-alive or one-shot connections
+- Open-loop (fixed-rate or Poisson) arrivals, timed from the scheduled
+  send time so queueing delay is not hidden (no coordinated omission)
+- Latency percentiles and throughput summary
+"""
+
+import http.client
+import math
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies_ms: List[float], errors: int, elapsed_s: float) -> Dict:
+    """Throughput and latency distribution for one run"""
+    ordered = sorted(latencies_ms)
+    completed = len(ordered)
+    return {
+        'requests': completed + errors,
+        'completed': completed,
+        'errors': errors,
+        'elapsed_s': round(elapsed_s, 3),
+        'throughput_rps': round(completed / elapsed_s, 1) if elapsed_s > 0 else 0,
+        'latency_ms': {
+            'mean': round(sum(ordered) / completed, 3) if completed else 0,
+            'p50': round(percentile(ordered, 50), 3),
+            'p95': round(percentile(ordered, 95), 3),
+            'p99': round(percentile(ordered, 99), 3),
+            'max': round(ordered[-1], 3) if ordered else 0
+        }
+    }
+
+
+class HTTPClient:
+    """One client connection; reconnects when the server closes it"""
+
+    def __init__(self, host: str, port: int, keep_alive: bool = True, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def get(self, path: str) -> int:
+        """GET path and drain the body; returns the HTTP status"""
+        reused = self.conn is not None
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            headers = {} if self.keep_alive else {'Connection': 'close'}
+            self.conn.request('GET', path, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            if not self.keep_alive or response.will_close:
+                self.close()
+            return response.status
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            self.close()
+            # The server closed an idle keep-alive connection; like browsers
+            # and urllib3, retry a GET once on a fresh connection
+            if reused:
+                return self.get(path)
+            raise
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def run_closed_loop(host: str, port: int, next_path: Callable[[int], str], concurrency: int,
+                    duration_s: float, keep_alive: bool = True,
+                    on_result: Optional[Callable[[str, int, float], None]] = None) -> Dict:
+    """Each of `concurrency` workers issues requests back to back for duration_s.
+
+    next_path(worker_index) picks the path for the next request;
+    on_result(path, status, latency_ms) is called for every completed request
+    (status 0 means a transport error).
+    """
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def worker(index: int):
+        client = HTTPClient(host, port, keep_alive=keep_alive)
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            path = next_path(index)
+            start = time.perf_counter()
+            try:
+                status = client.get(path)
+            except (OSError, http.client.HTTPException):
+                status = 0
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if 200 <= status < 500:
+                local_latencies.append(elapsed_ms)
+            else:
+                local_errors += 1
+            if on_result:
+                on_result(path, status, elapsed_ms)
+        client.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def run_open_loop(host: str, port: int, next_path: Callable[[int], str], rate: float,
+                  duration_s: float, concurrency: int, keep_alive: bool = True, poisson: bool = True,
+                  on_result: Optional[Callable[[str, int, float], None]] = None,
+                  seed: Optional[int] = None) -> Dict:
+    """Issue requests at `rate` per second for duration_s, whatever the server does.
+
+    Requests are served by up to `concurrency` connections; when all are
+    busy, arrivals wait and that wait counts towards their latency.
+    next_path(sequence) picks the path of the sequence-th request.
+    """
+    pending: queue.Queue = queue.Queue()
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    rng = random.Random(seed)
+
+    def worker():
+        client = HTTPClient(host, port, keep_alive=keep_alive)
+        local_latencies = []
+        local_errors = 0
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            path, scheduled = item
+            try:
+                status = client.get(path)
+            except (OSError, http.client.HTTPException):
+                status = 0
+            elapsed_ms = (time.perf_counter() - scheduled) * 1000
+            if 200 <= status < 500:
+                local_latencies.append(elapsed_ms)
+            else:
+                local_errors += 1
+            if on_result:
+                on_result(path, status, elapsed_ms)
+        client.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    deadline = started + duration_s
+    scheduled = started
+    sequence = 0
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        pending.put((next_path(sequence), scheduled))
+        sequence += 1
+        scheduled += rng.expovariate(rate) if poisson else 1.0 / rate
+
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    result = summarize(latencies, errors[0], time.perf_counter() - started)
+    result['offered_rps'] = round(sequence / duration_s, 1)
+    return result
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Prometheus-style metrics without external dependencies
+- Counter, Gauge and cumulative-bucket Histogram with labels
+- Scrape-time collectors for values owned elsewhere (pool stats, caches)
+- Text exposition format 0.0.4, readable by Prometheus and compatible scrapers
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; spans sub-millisecond cache hits to slow exports
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+        return f'{name}{{{rendered}}} {_format_value(value)}'
+    return f'{name} {_format_value(value)}'
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            yield self.name, self._labels(values), value
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labelvalues, amount: float = 1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues, value: float):
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        for values, counts, total in items:
+            labels = self._labels(values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', {**labels, 'le': _format_value(bound)}, cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Registry:
+    """Metrics plus scrape-time collectors rendered in exposition format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """collector() -> iterable of (name, kind, help, [(labels, value), ...])"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(_format_sample(*sample) for sample in metric.samples())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                lines.append(f'# collector failed: {_escape(str(e))}')
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.extend(_format_sample(name, labels, value) for labels, value in samples)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,16 @@
+-- Guarantee a unique index on firms.firm_id
+--
+-- The agents API resolves /api/agents/:firmId slugs with `WHERE firm_id = %s`
+-- and the pipelines upsert with `ON CONFLICT (firm_id)`; both need this index.
+-- The name matches the one Postgres gives a `firm_id ... UNIQUE` constraint,
+-- so databases that already have it are left untouched.
+--
+-- Apply outside a transaction (CONCURRENTLY does not block writes):
+--   psql "$DATABASE_URL" -f migrations/001_firms_firm_id_unique_index.sql
+--
+-- The build fails if duplicate firm_ids exist; list them with:
+--   SELECT firm_id, COUNT(*) FROM firms GROUP BY firm_id HAVING COUNT(*) > 1;
+-- A failed concurrent build leaves an INVALID index behind: DROP INDEX
+-- CONCURRENTLY firms_firm_id_key, fix the duplicates and re-run.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS firms_firm_id_key ON firms (firm_id);
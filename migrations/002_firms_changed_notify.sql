@@ -0,0 +1,22 @@
+-- NOTIFY firms_changed with the row id on every firms insert/update/delete
+--
+-- Keeps the agents API firm resolver (firm_resolver.py) in sync without
+-- polling. Payload is firms.id as text.
+--
+--   psql "$DATABASE_URL" -f migrations/002_firms_changed_notify.sql
+
+CREATE OR REPLACE FUNCTION notify_firms_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('firms_changed', OLD.id::text);
+    ELSE
+        PERFORM pg_notify('firms_changed', NEW.id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS firms_changed_notify ON firms;
+CREATE TRIGGER firms_changed_notify
+    AFTER INSERT OR UPDATE OR DELETE ON firms
+    FOR EACH ROW EXECUTE FUNCTION notify_firms_changed();
@@ -0,0 +1,24 @@
+-- NOTIFY evidence_changed on every evidence_collection insert/update/delete
+--
+-- Invalidates the agents API evidence cache (evidence_store.EvidenceCache).
+-- Payload is '<collected_by>:<firm_id>'; Postgres folds identical payloads
+-- within one transaction, so bulk upserts send one notification per pair.
+--
+--   psql "$DATABASE_URL" -f migrations/003_evidence_changed_notify.sql
+
+CREATE OR REPLACE FUNCTION notify_evidence_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM pg_notify('evidence_changed', OLD.collected_by || ':' || OLD.firm_id);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM pg_notify('evidence_changed', NEW.collected_by || ':' || NEW.firm_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS evidence_changed_notify ON evidence_collection;
+CREATE TRIGGER evidence_changed_notify
+    AFTER INSERT OR UPDATE OR DELETE ON evidence_collection
+    FOR EACH ROW EXECUTE FUNCTION notify_evidence_changed();
@@ -0,0 +1,12 @@
+-- Store the input fingerprint each evidence row was computed from
+--
+-- run_agents_all_firms.py hashes a firm's agent inputs (the firm row fields
+-- an agent reads plus the agent version) and skips (firm, agent) pairs whose
+-- stored fingerprint still matches and whose evidence is inside the
+-- staleness window. Rows without a fingerprint are always re-run once.
+-- AgentExecutor.ensure_tables adds the column too; adding a nullable column
+-- without a default is a catalog-only change.
+--
+--   psql "$DATABASE_URL" -f migrations/004_evidence_input_fingerprint.sql
+
+ALTER TABLE evidence_collection ADD COLUMN IF NOT EXISTS input_fingerprint VARCHAR(64);
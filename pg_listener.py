@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Postgres LISTEN/NOTIFY dispatcher
+- One dedicated connection per process, shared by all channels
+- Notifications delivered to callbacks in small batches
+- Reconnects with a resync callback (notifications sent while
+  disconnected are lost, so subscribers reload their state)
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import psycopg
+from psycopg import sql
+
+logger = logging.getLogger(__name__)
+
+
+class NotifyListener:
+    """Background thread LISTENing on channels and dispatching payloads"""
+
+    def __init__(self, dsn: str, batch_window: float = 0.5, reconnect_delay: float = 5.0):
+        self.dsn = dsn
+        self.batch_window = batch_window
+        self.reconnect_delay = reconnect_delay
+        self._callbacks: Dict[str, List[Callable[[List[str]], None]]] = defaultdict(list)
+        self._resync: Dict[str, List[Callable[[], None]]] = defaultdict(list)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, channel: str, callback: Callable[[List[str]], None],
+                  on_resync: Optional[Callable[[], None]] = None):
+        """Call callback(payloads) for notifications on channel.
+
+        on_resync() runs after a reconnect, when notifications may have
+        been missed. Subscribe before start().
+        """
+        self._callbacks[channel].append(callback)
+        if on_resync:
+            self._resync[channel].append(on_resync)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='pg-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.batch_window + 1)
+
+    def _run(self):
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.dsn, autocommit=True) as conn:
+                    for channel in self._callbacks:
+                        conn.execute(sql.SQL('LISTEN {}').format(sql.Identifier(channel)))
+                    if connected_before:
+                        self._dispatch_resync()
+                    connected_before = True
+                    while not self._stop.is_set():
+                        batch = list(conn.notifies(timeout=self.batch_window))
+                        if batch:
+                            self._dispatch(batch)
+            except Exception as e:
+                logger.warning(f"LISTEN connection lost: {e}")
+                self._stop.wait(self.reconnect_delay)
+
+    def _dispatch(self, notifications):
+        payloads = defaultdict(list)
+        for notify in notifications:
+            payloads[notify.channel].append(notify.payload)
+        for channel, items in payloads.items():
+            for callback in self._callbacks.get(channel, []):
+                try:
+                    callback(items)
+                except Exception as e:
+                    logger.error(f"NOTIFY handler for {channel} failed: {e}")
+
+    def _dispatch_resync(self):
+        for channel, callbacks in self._resync.items():
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Resync for {channel} failed: {e}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Outbound HTTP for the discovery pipeline
+- One pooled requests.Session shared by all worker threads
+- Per-host token buckets instead of fixed sleeps between calls
+- A cap on requests in flight across all hosts
+- Retries on connection errors, 429 and 5xx with full-jitter exponential
+  backoff (Retry-After is honoured when the server sends one)
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class FetchClient:
+    """Rate-limited, bounded, retrying GETs over a shared session"""
+
+    def __init__(self, max_in_flight: int = 8, host_rate: float = 1.0, host_burst: Optional[float] = None,
+                 retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 10.0,
+                 timeout: float = 5.0, user_agent: str = 'Mozilla/5.0',
+                 host_overrides: Optional[Dict] = None):
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(host_rate, host_burst, host_overrides)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = user_agent
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_in_flight)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        # Full jitter: spreads retries so workers do not hit the host in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET with rate limiting and retries; raises after the last failed attempt"""
+        host = urlparse(url).netloc
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            self.limiter.acquire(host)
+            response = None
+            error: Optional[Exception] = None
+            with self._in_flight:
+                self._count('requests')
+                try:
+                    response = self.session.get(url, **kwargs)
+                except requests.RequestException as e:
+                    error = e
+            if error is None and response.status_code not in RETRY_STATUSES:
+                return response
+            if attempt >= self.retries:
+                self._count('failures')
+                if error is not None:
+                    raise error
+                return response
+            delay = self._backoff(attempt, response)
+            logger.debug(f"Retrying {url} in {delay:.2f}s ({error or response.status_code})")
+            self._count('retries')
+            attempt += 1
+            # Sleep outside the in-flight slot so other requests can proceed
+            time.sleep(delay)
+
+    def close(self):
+        self.session.close()
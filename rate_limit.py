@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Rate limiting primitives shared by the monitor and the discovery pipeline
+- Thread-safe token bucket (steady rate + burst capacity)
+- Per-host buckets for outbound crawling/search
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """Allow `rate` operations per second with bursts up to `capacity`.
+
+    A rate <= 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; otherwise return the seconds to wait"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None,
+                cancelled: Optional[threading.Event] = None) -> bool:
+        """Block until tokens are available; False on timeout or cancellation"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            if cancelled is not None:
+                if cancelled.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One TokenBucket per host, created on first use.
+
+    `overrides` maps host -> (rate, capacity) for hosts with their own limits.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 overrides: Optional[Dict[str, Tuple[float, Optional[float]]]] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.overrides = overrides or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, capacity = self.overrides.get(host, (self.rate, self.capacity))
+                bucket = self._buckets[host] = TokenBucket(rate, capacity)
+            return bucket
+
+    def acquire(self, host: str, timeout: Optional[float] = None,
+                cancelled: Optional[threading.Event] = None) -> bool:
+        return self.bucket(host).acquire(timeout=timeout, cancelled=cancelled)
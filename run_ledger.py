@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Checkpoint ledger for resumable pipeline runs
+- Every run gets its own run_id; each finished unit of work is recorded
+  as (run_id, stage, item key, input hash, output), so concurrent runs
+  never see each other's checkpoints
+- A resumed run reuses a checkpoint only when the input hash still
+  matches; changed inputs are recomputed. --from-stage ignores the
+  checkpoints of that stage and every later one
+- A run is owned through a lease (owner + heartbeat): two processes
+  cannot resume the same run, and a crashed owner's lease expires
+- Backends: Postgres (the pipeline's database) or a local SQLite file
+  (sqlite:///path/to/ledger.db), same schema and SQL for both
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('discover', 'enrich', 'save', 'agents')
+LEASE_S = 300
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS pipeline_runs (
+        run_id VARCHAR(64) PRIMARY KEY,
+        status VARCHAR(20) NOT NULL,
+        args TEXT,
+        owner VARCHAR(255),
+        started_at DOUBLE PRECISION,
+        heartbeat_at DOUBLE PRECISION,
+        finished_at DOUBLE PRECISION
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pipeline_checkpoints (
+        run_id VARCHAR(64) NOT NULL,
+        stage VARCHAR(20) NOT NULL,
+        item_key VARCHAR(500) NOT NULL,
+        input_hash CHAR(64) NOT NULL,
+        output TEXT,
+        completed_at DOUBLE PRECISION,
+        PRIMARY KEY (run_id, stage, item_key)
+    )
+    """,
+)
+
+UPSERT_CHECKPOINT = """
+    INSERT INTO pipeline_checkpoints (run_id, stage, item_key, input_hash, output, completed_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (run_id, stage, item_key) DO UPDATE SET
+        input_hash = EXCLUDED.input_hash,
+        output = EXCLUDED.output,
+        completed_at = EXCLUDED.completed_at
+"""
+
+
+def input_hash(value: Any) -> str:
+    """Stable digest of a stage input (JSON with sorted keys)"""
+    data = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class LeaseError(RuntimeError):
+    """The run is owned by another live process"""
+
+
+class RunLedger:
+    """Per-run, per-stage, per-item checkpoints with lease-based ownership"""
+
+    def __init__(self, url: str, lease_s: float = LEASE_S):
+        self.url = url
+        self.lease_s = lease_s
+        self.sqlite = url.startswith('sqlite:///')
+        if self.sqlite:
+            path = url[len('sqlite:///'):]
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        else:
+            self.conn = psycopg.connect(url)
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.run_id: Optional[str] = None
+        self.args: Dict = {}
+        self.from_stage: Optional[str] = None
+        self._lock = threading.Lock()
+        # (stage, key) -> (input hash, output) for the run being resumed
+        self._done: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+        self.stats = {stage: {'reused': 0, 'recorded': 0} for stage in STAGES}
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+        with self._lock:
+            for statement in SCHEMA:
+                self._execute(statement)
+            self.conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()):
+        if self.sqlite:
+            sql = sql.replace('%s', '?')
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
+        return cur
+
+    def _write(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            try:
+                rowcount = self._execute(sql, params).rowcount
+                self.conn.commit()
+                return rowcount
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def start(self, args: Dict) -> str:
+        """Begin a fresh run"""
+        now = time.time()
+        self.run_id = time.strftime('%Y%m%dT%H%M%S', time.gmtime(now)) + '-' + uuid.uuid4().hex[:8]
+        self.args = dict(args)
+        self._write(
+            "INSERT INTO pipeline_runs (run_id, status, args, owner, started_at, heartbeat_at) "
+            "VALUES (%s, 'running', %s, %s, %s, %s)",
+            (self.run_id, json.dumps(self.args), self.owner, now, now)
+        )
+        self._start_heartbeat()
+        logger.info(f"📒 Run {self.run_id} started")
+        return self.run_id
+
+    def resume(self, run_id: Optional[str] = None, from_stage: Optional[str] = None) -> str:
+        """Take over a previous run (default: the latest unfinished one) and load its checkpoints"""
+        if from_stage is not None and from_stage not in STAGES:
+            raise ValueError(f"Unknown stage {from_stage!r}; expected one of {', '.join(STAGES)}")
+        with self._lock:
+            if run_id is None:
+                row = self._execute(
+                    "SELECT run_id FROM pipeline_runs WHERE status <> 'completed' "
+                    "ORDER BY started_at DESC LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    raise LookupError('No unfinished run to resume')
+                run_id = row[0]
+            row = self._execute("SELECT args FROM pipeline_runs WHERE run_id = %s", (run_id,)).fetchone()
+            self.conn.commit()
+        if row is None:
+            raise LookupError(f'Unknown run {run_id}')
+        now = time.time()
+        claimed = self._write(
+            "UPDATE pipeline_runs SET owner = %s, heartbeat_at = %s, status = 'running', finished_at = NULL "
+            "WHERE run_id = %s AND (owner IS NULL OR owner = %s OR status <> 'running' OR heartbeat_at < %s)",
+            (self.owner, now, run_id, self.owner, now - self.lease_s)
+        )
+        if claimed != 1:
+            raise LeaseError(f'Run {run_id} is still owned by another process')
+        self.run_id = run_id
+        self.args = json.loads(row[0] or '{}')
+        self.from_stage = from_stage
+        skipped = set(STAGES[STAGES.index(from_stage):]) if from_stage else set()
+        with self._lock:
+            rows = self._execute(
+                "SELECT stage, item_key, input_hash, output FROM pipeline_checkpoints WHERE run_id = %s",
+                (run_id,)
+            ).fetchall()
+            self.conn.commit()
+        self._done = {
+            (stage, key): (digest, json.loads(output) if output is not None else None)
+            for stage, key, digest, output in rows if stage not in skipped
+        }
+        self._start_heartbeat()
+        logger.info(f"📒 Resuming run {run_id}: {len(self._done)} reusable checkpoints"
+                    f"{f', recomputing from {from_stage}' if from_stage else ''}")
+        return run_id
+
+    def lookup(self, stage: str, key: str, digest: str) -> Tuple[bool, Any]:
+        """(True, output) when this item already finished this stage with the same input"""
+        done = self._done.get((stage, key))
+        if done is None or done[0] != digest:
+            return False, None
+        with self._lock:
+            self.stats[stage]['reused'] += 1
+        return True, done[1]
+
+    def record(self, stage: str, key: str, digest: str, output: Any):
+        self.record_many(stage, [(key, digest, output)])
+
+    def record_many(self, stage: str, entries: Iterable[Tuple[str, str, Any]]):
+        """Checkpoint several items of one stage in one transaction"""
+        now = time.time()
+        rows = [(self.run_id, stage, key, digest, json.dumps(output, default=str), now)
+                for key, digest, output in entries]
+        if not rows:
+            return
+        sql = UPSERT_CHECKPOINT.replace('%s', '?') if self.sqlite else UPSERT_CHECKPOINT
+        with self._lock:
+            try:
+                cur = self.conn.cursor()
+                cur.executemany(sql, rows)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            self.stats[stage]['recorded'] += len(rows)
+
+    def _start_heartbeat(self):
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name='ledger-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stop.wait(self.lease_s / 3):
+            try:
+                if not self._write("UPDATE pipeline_runs SET heartbeat_at = %s WHERE run_id = %s AND owner = %s",
+                                   (time.time(), self.run_id, self.owner)):
+                    logger.warning(f"⚠️  Lost the lease on run {self.run_id}")
+            except Exception as e:
+                logger.warning(f"⚠️  Ledger heartbeat failed: {e}")
+
+    def finish(self, status: str = 'completed'):
+        """Mark the run completed (or failed) and release the lease"""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        self._write("UPDATE pipeline_runs SET status = %s, finished_at = %s, owner = NULL "
+                    "WHERE run_id = %s AND owner = %s",
+                    (status, time.time(), self.run_id, self.owner))
+        logger.info(f"📒 Run {self.run_id} {status}")
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {'run_id': self.run_id, 'from_stage': self.from_stage,
+                    'stages': {stage: dict(counts) for stage, counts in self.stats.items()}}
+
+    def close(self):
+        self._stop.set()
+        self.conn.close()
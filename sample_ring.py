@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Persistent probe history for the monitor
+- Fixed-size ring buffers in one memory-mapped file: raw samples
+  (timestamp, target, latency, status) plus 10-second and per-minute
+  rollups (count/errors/min/max/sum per target)
+- Appends are a struct pack into the mapping with no fsync: the kernel
+  writes dirty pages back, so a crash loses at most the last few seconds
+- Range queries binary-search the ring by timestamp and downsample to
+  min/avg/max per bucket from the coarsest rollup tier that fits the
+  bucket width. The ring is shared by all targets, so a query reads
+  every record in its window: window / period x targets rollups (raw
+  samples only for buckets under 10s), independent of the history size
+- Reopening the file resumes the rollups of the current period instead
+  of appending a second record for it
+"""
+
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'GPTIRING'
+VERSION = 2
+HEADER_SIZE = 4096
+# magic, version, raw / rollup / fine rollup capacity, then head and count of each ring
+HEADER = struct.Struct('<8sIIIIQQQQQQ')
+TARGETS_OFFSET = 512
+TARGET_NAME_BYTES = 32
+MAX_TARGETS = (HEADER_SIZE - TARGETS_OFFSET) // TARGET_NAME_BYTES
+
+# timestamp, latency_ms (NaN when there was no response), target id, status
+RAW = struct.Struct('<dfHBx')
+# period start, latency sum, min, max, samples, errors, samples with a latency, target id
+ROLLUP = struct.Struct('<ddffIIIH2x')
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_DOWN = 2
+STATUS_NAMES = {'ok': STATUS_OK, 'error': STATUS_ERROR, 'down': STATUS_DOWN}
+
+ROLLUP_SECONDS = 60
+FINE_ROLLUP_SECONDS = 10
+DEFAULT_RAW_CAPACITY = 1 << 20          # 16 MiB, ~12 days of 1s probes on one target
+DEFAULT_ROLLUP_CAPACITY = 1 << 18       # 10 MiB, ~6 months of minutes for a few targets
+DEFAULT_FINE_ROLLUP_CAPACITY = 1 << 18  # 10 MiB, ~1 week of 10s periods for a few targets
+
+
+class _Ring:
+    """Ring of fixed-size records inside the mapping; head/count live in the header"""
+
+    def __init__(self, buf, offset: int, record: struct.Struct, capacity: int):
+        self.buf = buf
+        self.offset = offset
+        self.record = record
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+
+    def physical(self, logical: int) -> int:
+        return (self.head - self.count + logical) % self.capacity
+
+    def write(self, index: int, *values):
+        self.record.pack_into(self.buf, self.offset + index * self.record.size, *values)
+
+    def read(self, index: int) -> Tuple:
+        return self.record.unpack_from(self.buf, self.offset + index * self.record.size)
+
+    def append(self, *values) -> int:
+        index = self.head
+        self.write(index, *values)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return index
+
+    def bisect(self, timestamp: float, head: int, count: int) -> int:
+        """First logical index whose timestamp is >= timestamp"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            physical = (head - count + mid) % self.capacity
+            if self.read(physical)[0] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def scan(self, start: float, end: float):
+        """Records with start <= timestamp < end, oldest first"""
+        head, count = self.head, self.count
+        first = self.bisect(start, head, count)
+        last = self.bisect(end, head, count)
+        if first >= last:
+            return
+        begin = (head - count + first) % self.capacity
+        length = last - first
+        # At most two contiguous slices (before and after the wrap)
+        for slice_start, slice_len in ((begin, min(length, self.capacity - begin)),
+                                       (0, max(0, length - (self.capacity - begin)))):
+            if slice_len:
+                offset = self.offset + slice_start * self.record.size
+                yield from self.record.iter_unpack(self.buf[offset:offset + slice_len * self.record.size])
+
+
+class SampleRing:
+    """Append-only probe history in a fixed-size memory-mapped file"""
+
+    def __init__(self, path: str, raw_capacity: int = DEFAULT_RAW_CAPACITY,
+                 rollup_capacity: int = DEFAULT_ROLLUP_CAPACITY,
+                 fine_rollup_capacity: int = DEFAULT_FINE_ROLLUP_CAPACITY):
+        self.path = path
+        self._lock = threading.Lock()
+        size = HEADER_SIZE + raw_capacity * RAW.size + (rollup_capacity + fine_rollup_capacity) * ROLLUP.size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        offset = HEADER_SIZE
+        self.raw = _Ring(self._mmap, offset, RAW, raw_capacity)
+        offset += raw_capacity * RAW.size
+        self.rollups = _Ring(self._mmap, offset, ROLLUP, rollup_capacity)
+        offset += rollup_capacity * ROLLUP.size
+        self.fine_rollups = _Ring(self._mmap, offset, ROLLUP, fine_rollup_capacity)
+        # (period seconds, ring), finest first
+        self._tiers = ((FINE_ROLLUP_SECONDS, self.fine_rollups), (ROLLUP_SECONDS, self.rollups))
+        self._targets: Dict[str, int] = {}
+        # (tier period, target id) -> (period start, rollup slot) being accumulated
+        self._open_rollups: Dict[Tuple[int, int], Tuple[float, int]] = {}
+        self._load_header()
+
+    def _load_header(self):
+        magic, version, *layout = HEADER.unpack_from(self._mmap, 0)
+        capacities, positions = layout[:3], layout[3:]
+        rings = (self.raw, self.rollups, self.fine_rollups)
+        if (magic, version, capacities) != (MAGIC, VERSION, [ring.capacity for ring in rings]):
+            if magic == MAGIC:
+                logger.warning(f"Sample ring {self.path} has a different layout; starting empty")
+            self._mmap[:HEADER_SIZE] = bytes(HEADER_SIZE)
+            positions = [0] * 6
+        for index, ring in enumerate(rings):
+            ring.head, ring.count = positions[2 * index], positions[2 * index + 1]
+        self._write_header()
+        for target_id in range(MAX_TARGETS):
+            offset = TARGETS_OFFSET + target_id * TARGET_NAME_BYTES
+            name = bytes(self._mmap[offset:offset + TARGET_NAME_BYTES]).rstrip(b'\0').decode()
+            if name:
+                self._targets[name] = target_id
+        self._reopen_rollups()
+
+    def _reopen_rollups(self):
+        """Find each target's newest rollup per tier, so appends in that
+        period update it in place instead of adding a duplicate record"""
+        for period, ring in self._tiers:
+            newest = None
+            # Records are in time order; the newest period of every target
+            # lies within one period of the newest record
+            for logical in range(ring.count - 1, max(-1, ring.count - 1 - 2 * MAX_TARGETS), -1):
+                slot = ring.physical(logical)
+                started, *_, target_id = ring.read(slot)
+                if newest is None:
+                    newest = started
+                elif started < newest - period:
+                    break
+                self._open_rollups.setdefault((period, target_id), (started, slot))
+
+    def _write_header(self):
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION,
+                         self.raw.capacity, self.rollups.capacity, self.fine_rollups.capacity,
+                         self.raw.head, self.raw.count, self.rollups.head, self.rollups.count,
+                         self.fine_rollups.head, self.fine_rollups.count)
+
+    def _target_id(self, target: str) -> int:
+        target_id = self._targets.get(target)
+        if target_id is None:
+            encoded = target.encode()
+            if len(encoded) > TARGET_NAME_BYTES or len(self._targets) >= MAX_TARGETS:
+                raise ValueError(f"Cannot register sample target {target!r}")
+            target_id = len(self._targets)
+            offset = TARGETS_OFFSET + target_id * TARGET_NAME_BYTES
+            self._mmap[offset:offset + TARGET_NAME_BYTES] = encoded.ljust(TARGET_NAME_BYTES, b'\0')
+            self._targets[target] = target_id
+        return target_id
+
+    def append(self, target: str, latency_ms: Optional[float], status: str = 'ok',
+               timestamp: Optional[float] = None):
+        """Record one probe result; latency None means no response"""
+        timestamp = time.time() if timestamp is None else timestamp
+        latency = math.nan if latency_ms is None else float(latency_ms)
+        status_code = STATUS_NAMES[status]
+        error = int(status_code != STATUS_OK)
+        timed = int(latency_ms is not None)
+        with self._lock:
+            target_id = self._target_id(target)
+            self.raw.append(timestamp, latency, target_id, status_code)
+
+            # Update each tier's current rollup in place; start a new slot on a new period
+            for period, ring in self._tiers:
+                started = timestamp - timestamp % period
+                open_start, slot = self._open_rollups.get((period, target_id), (None, None))
+                if open_start == started:
+                    _, total, low, high, count, errors, timed_count, _ = ring.read(slot)
+                    if timed:
+                        total += latency
+                        low = latency if math.isnan(low) else min(low, latency)
+                        high = latency if math.isnan(high) else max(high, latency)
+                    ring.write(slot, started, total, low, high, count + 1, errors + error,
+                               timed_count + timed, target_id)
+                else:
+                    slot = ring.append(started, latency if timed else 0.0, latency, latency,
+                                       1, error, timed, target_id)
+                    self._open_rollups[(period, target_id)] = (started, slot)
+            self._write_header()
+
+    def targets(self) -> List[str]:
+        return sorted(self._targets)
+
+    def query(self, target: str, start: float, end: float, buckets: int = 120) -> Dict:
+        """Downsample [start, end) into at most `buckets` min/avg/max points"""
+        buckets = max(1, min(buckets, 2000))
+        width = max(1.0, (end - start) / buckets)
+        target_id = self._targets.get(target)
+        # The coarsest rollup tier whose period fits in a bucket
+        period, ring = None, None
+        for tier_period, tier_ring in self._tiers:
+            if width >= tier_period:
+                period, ring = tier_period, tier_ring
+        if period is not None:
+            # Align buckets to whole periods so each rollup lands in one
+            # bucket; the width is sized after aligning start, so the
+            # aligned range still fits in `buckets` points
+            start = start - start % period
+            width = max(period, math.ceil((end - start) / buckets / period) * period)
+
+        # bucket index -> [count, errors, latency sum, latency samples, min, max]
+        acc: Dict[int, List] = {}
+        if target_id is not None:
+            if ring is not None:
+                for started, total, low, high, count, errors, timed, record_target in ring.scan(start, end):
+                    if record_target != target_id:
+                        continue
+                    bucket = acc.setdefault(int((started - start) // width), [0, 0, 0.0, 0, math.inf, -math.inf])
+                    bucket[0] += count
+                    bucket[1] += errors
+                    if timed:
+                        bucket[2] += total
+                        bucket[3] += timed
+                        bucket[4] = min(bucket[4], low)
+                        bucket[5] = max(bucket[5], high)
+            else:
+                # Buckets under FINE_ROLLUP_SECONDS: the window holds fewer
+                # than buckets x 10s of samples
+                for timestamp, latency, record_target, status in self.raw.scan(start, end):
+                    if record_target != target_id:
+                        continue
+                    bucket = acc.setdefault(int((timestamp - start) // width), [0, 0, 0.0, 0, math.inf, -math.inf])
+                    bucket[0] += 1
+                    bucket[1] += status != STATUS_OK
+                    if not math.isnan(latency):
+                        bucket[2] += latency
+                        bucket[3] += 1
+                        bucket[4] = min(bucket[4], latency)
+                        bucket[5] = max(bucket[5], latency)
+
+        points = []
+        for index in sorted(acc):
+            count, errors, total, timed, low, high = acc[index]
+            points.append({
+                't': start + index * width,
+                'count': count,
+                'errors': errors,
+                'min': round(low, 3) if timed else None,
+                'avg': round(total / timed, 3) if timed else None,
+                'max': round(high, 3) if timed else None
+            })
+        return {
+            'target': target,
+            'start': start,
+            'end': end,
+            'bucket_s': width,
+            'source': 'rollup' if period is not None else 'raw',
+            'points': points
+        }
+
+    def stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'targets': self.targets(),
+            'raw_samples': self.raw.count,
+            'raw_capacity': self.raw.capacity,
+            'rollups': self.rollups.count,
+            'rollup_capacity': self.rollups.capacity,
+            'fine_rollups': self.fine_rollups.count,
+            'fine_rollup_capacity': self.fine_rollups.capacity,
+            'oldest_sample': self.raw.read(self.raw.physical(0))[0] if self.raw.count else None
+        }
+
+    def close(self):
+        with self._lock:
+            self._mmap.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Compare the legacy single-threaded HTTP/1.0 server with the pooled keep-alive server.
+
+Both servers run in-process on ephemeral ports with the same handler, which
+sleeps --service-ms per request to stand in for the agents API DB query.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_serving import KeepAliveHandler, PooledHTTPServer  # noqa: E402
+from loadgen import run_closed_loop  # noqa: E402
+
+PAYLOAD = json.dumps([
+    {"agent": code, "status": "SUCCESS", "evidence": {"score": 72.5, "confidence": 0.85}}
+    for code in ("RVI", "SSS", "REM", "FRP", "IRS", "MIS", "IIP")
+]).encode()
+
+
+class LegacyHTTPServer(HTTPServer):
+    # Same listen backlog as the pooled server so the comparison is fair
+    request_queue_size = PooledHTTPServer.request_queue_size
+
+
+def make_handler(base: type, service_ms: float) -> type:
+    class Handler(base):
+        def do_GET(self) -> None:
+            time.sleep(service_ms / 1000.0)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(PAYLOAD)))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def run_against(httpd: HTTPServer, args: argparse.Namespace, keep_alive: bool) -> Dict[str, Any]:
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    host, port = httpd.server_address[:2]
+    try:
+        # Short warm-up so connection setup is not all in the measured window
+        run_closed_loop(host, port, lambda i: "/api/agents/1", args.concurrency, 0.5, keep_alive)
+        return run_closed_loop(host, port, lambda i: "/api/agents/1", args.concurrency, args.duration, keep_alive)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test legacy vs pooled keep-alive HTTP serving.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to drive each server")
+    parser.add_argument("--service-ms", type=float, default=5.0, help="Simulated per-request DB time")
+    parser.add_argument("--workers", type=int, default=32, help="Worker threads for the pooled server")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    legacy = LegacyHTTPServer(("127.0.0.1", 0), make_handler(BaseHTTPRequestHandler, args.service_ms))
+    print(f"[loadtest] legacy HTTPServer (HTTP/1.0), {args.concurrency} clients, {args.duration:g}s ...")
+    baseline = run_against(legacy, args, keep_alive=False)
+
+    pooled = PooledHTTPServer(("127.0.0.1", 0), make_handler(KeepAliveHandler, args.service_ms), workers=args.workers)
+    print(f"[loadtest] PooledHTTPServer (HTTP/1.1 keep-alive, {args.workers} workers) ...")
+    candidate = run_against(pooled, args, keep_alive=True)
+
+    print()
+    print(f"  {'server':<10} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for name, result in (("legacy", baseline), ("pooled", candidate)):
+        latency = result["latency_ms"]
+        print(f"  {name:<10} {result['throughput_rps']:>10.1f} {latency['p50']:>10.2f} {latency['p99']:>10.2f} {result['errors']:>8}")
+    speedup = candidate["throughput_rps"] / baseline["throughput_rps"] if baseline["throughput_rps"] else 0
+    p99_ratio = baseline["latency_ms"]["p99"] / candidate["latency_ms"]["p99"] if candidate["latency_ms"]["p99"] else 0
+    print(f"\n[loadtest] throughput x{speedup:.1f}, p99 x{p99_ratio:.1f} lower")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"params": vars(args), "legacy": baseline, "pooled": candidate}, handle, indent=2)
+        print(f"[loadtest] output: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+On-disk web search cache (tmp/web_search_cache)
+- One JSON file per query, named by the MD5 of the normalized query and
+  holding {"query", "timestamp", "results"} as documented in
+  docs/WEB_SEARCH_SERVICE.md, so existing cache files stay valid
+- TTL (GPTI_WEB_SEARCH_CACHE_TTL_H) and a total size cap with LRU eviction
+- Atomic writes (temp file + rename) for entries and for the index
+- Compact index file (_index.json: key -> [bytes, created, last used])
+  so startup and eviction never read the entries themselves; it is saved
+  on eviction, on flush()/close() and at most every INDEX_FLUSH_INTERVAL_S
+  or INDEX_FLUSH_EVERY changes, not on every put. Entry files newer than
+  the index (a run that stopped before saving it) are re-read on startup
+- Offline replay: serve whatever is cached (expired or not) and never
+  touch the network; misses return no results
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = '_index.json'
+INDEX_VERSION = 1
+# New entries and last-used times are saved in batches; evictions save at once
+INDEX_FLUSH_EVERY = 50
+INDEX_FLUSH_INTERVAL_S = 5.0
+
+
+def normalize_query(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+
+def cache_key(query: str) -> str:
+    return hashlib.md5(normalize_query(query).encode()).hexdigest()
+
+
+def _atomic_write(directory: str, filename: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, os.path.join(directory, filename))
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _parse_timestamp(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class SearchCache:
+    """Query -> results cache with TTL, size-capped LRU and offline replay"""
+
+    def __init__(self, directory: str, ttl_s: float = 24 * 3600, max_bytes: int = 256 * 1024 * 1024,
+                 offline: bool = False):
+        self.directory = directory
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        # key -> [bytes, created (epoch s), last used (epoch s)]
+        self._index: Dict[str, List[float]] = {}
+        self._total_bytes = 0
+        self._dirty = 0
+        self._saved_at = time.monotonic()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'offline_misses': 0, 'writes': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+        self._evict()
+        if self._dirty:
+            self._save_index()
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(path, encoding='utf-8') as handle:
+                stored = json.load(handle)
+            if stored.get('version') != INDEX_VERSION:
+                raise ValueError('index version mismatch')
+            entries = stored['entries']
+            saved_at = os.stat(path).st_mtime
+        except (OSError, ValueError, KeyError):
+            self._rebuild_index()
+        else:
+            self._reconcile_index(entries, saved_at)
+        self._total_bytes = sum(entry[0] for entry in self._index.values())
+
+    def _entry_files(self) -> Dict[str, os.stat_result]:
+        files = {}
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                name = item.name
+                if not name.endswith('.json') or name == INDEX_FILE or name.startswith('.tmp-'):
+                    continue
+                try:
+                    files[name[:-5]] = item.stat()
+                except OSError:
+                    continue
+        return files
+
+    def _read_entry(self, key: str, stat: os.stat_result) -> Optional[List[float]]:
+        try:
+            with open(os.path.join(self.directory, f'{key}.json'), encoding='utf-8') as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        created = _parse_timestamp(entry.get('timestamp')) or stat.st_mtime
+        return [stat.st_size, created, max(stat.st_atime, stat.st_mtime)]
+
+    def _reconcile_index(self, entries: Dict[str, List[float]], saved_at: float):
+        """Match a stored index to the files: drop entries whose file is gone
+        (e.g. a manual cleanup), re-read files written after the index was saved"""
+        self._index = {}
+        stale = 0
+        for key, stat in self._entry_files().items():
+            entry = entries.get(key)
+            if entry is None or stat.st_mtime > saved_at or stat.st_size != entry[0]:
+                entry = self._read_entry(key, stat)
+                stale += 1
+                if entry is None:
+                    continue
+            self._index[key] = entry
+        if stale or len(self._index) != len(entries):
+            self._dirty += 1
+            logger.info(f"Search cache index was stale: re-read {stale} entries")
+
+    def _rebuild_index(self):
+        """Scan the cache files once; used when the index is missing or unreadable"""
+        self._index = {}
+        for key, stat in self._entry_files().items():
+            entry = self._read_entry(key, stat)
+            if entry is not None:
+                self._index[key] = entry
+        self._dirty += 1
+        logger.info(f"Rebuilt search cache index: {len(self._index)} entries")
+
+    def _save_index(self):
+        data = json.dumps({'version': INDEX_VERSION, 'entries': self._index}, separators=(',', ':'))
+        _atomic_write(self.directory, INDEX_FILE, data.encode())
+        self._dirty = 0
+        self._saved_at = time.monotonic()
+
+    def _changed(self):
+        self._dirty += 1
+        if self._dirty >= INDEX_FLUSH_EVERY or time.monotonic() - self._saved_at >= INDEX_FLUSH_INTERVAL_S:
+            self._save_index()
+
+    def _touch(self, entry: List[float], now: float):
+        entry[2] = now
+        self._changed()
+
+    def _remove(self, key: str):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[0]
+            self._dirty += 1
+        try:
+            os.unlink(os.path.join(self.directory, f'{key}.json'))
+        except FileNotFoundError:
+            pass
+
+    def get(self, query: str) -> Optional[List[Dict]]:
+        """Cached results, or None on a miss (or an expired entry when online)"""
+        key = cache_key(query)
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if not self.offline and now - entry[1] > self.ttl_s:
+                self.stats['expired'] += 1
+                return None
+            try:
+                with open(os.path.join(self.directory, f'{key}.json'), encoding='utf-8') as handle:
+                    results = json.load(handle).get('results', [])
+            except (OSError, ValueError):
+                self._remove(key)
+                self.stats['misses'] += 1
+                return None
+            self._touch(entry, now)
+            self.stats['hits'] += 1
+            return results
+
+    def put(self, query: str, results: List[Dict]):
+        key = cache_key(query)
+        data = json.dumps({
+            'query': query,
+            'timestamp': datetime.now().isoformat(),
+            'results': results
+        }, indent=2, default=str).encode()
+        now = time.time()
+        with self._lock:
+            _atomic_write(self.directory, f'{key}.json', data)
+            previous = self._index.get(key)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._index[key] = [len(data), now, now]
+            self._total_bytes += len(data)
+            self.stats['writes'] += 1
+            if self._evict():
+                self._save_index()
+            else:
+                self._changed()
+
+    def _evict(self) -> bool:
+        if self._total_bytes <= self.max_bytes:
+            return False
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][2]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+            self.stats['evictions'] += 1
+        return True
+
+    def get_or_fetch(self, query: str, fetch: Callable[[str], Optional[List[Dict]]]) -> List[Dict]:
+        """Cached results, else fetch(query) (None = failed, not cached).
+
+        In offline mode a miss returns [] without calling fetch.
+        """
+        results = self.get(query)
+        if results is not None:
+            return results
+        if self.offline:
+            with self._lock:
+                self.stats['offline_misses'] += 1
+            return []
+        results = fetch(query)
+        if results is None:
+            return []
+        self.put(query, results)
+        return results
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def close(self):
+        self.flush()
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+                'offline': self.offline
+            }
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+SLO burn-rate alerting for the monitor's probe stream
+- Availability (status ok) and latency (ok and under a threshold) objectives
+- Multi-window, multi-burn-rate rules: an alert fires only when both the
+  long and the short window burn error budget faster than the factor
+  (default 14.4x over 1h+5m and 6x over 6h+30m)
+- Rolling windows are bucketed counters with running totals, so each
+  sample and each evaluation is O(1): history is never rescanned
+- Alert transitions go to notifiers: a webhook poster or, for tests and
+  local runs, an in-memory recorder; `python slo.py sink` prints posts
+"""
+
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# (severity, long window s, short window s, burn-rate factor)
+DEFAULT_RULES = (
+    ('page', 3600, 300, 14.4),
+    ('ticket', 21600, 1800, 6.0),
+)
+BUCKETS_PER_WINDOW = 60
+
+
+class RollingCounter:
+    """Good/total counts over the last `window` seconds in fixed buckets"""
+
+    def __init__(self, window: float, buckets: int = BUCKETS_PER_WINDOW):
+        self.window = window
+        self.bucket_s = window / buckets
+        self.good = [0] * buckets
+        self.total = [0] * buckets
+        self.good_sum = 0
+        self.total_sum = 0
+        self.current = None     # absolute index of the newest bucket
+
+    def _advance(self, now: float):
+        index = int(now // self.bucket_s)
+        if self.current is None:
+            self.current = index
+            return
+        if index <= self.current:
+            return
+        # Clear the buckets that fell out of the window; at most one full lap
+        steps = min(index - self.current, len(self.total))
+        for step in range(1, steps + 1):
+            slot = (self.current + step) % len(self.total)
+            self.good_sum -= self.good[slot]
+            self.total_sum -= self.total[slot]
+            self.good[slot] = 0
+            self.total[slot] = 0
+        self.current = index
+
+    def add(self, good: bool, now: float):
+        # Late samples (older than the newest bucket) are counted in the newest
+        self._advance(now)
+        slot = self.current % len(self.total)
+        self.total[slot] += 1
+        self.total_sum += 1
+        if good:
+            self.good[slot] += 1
+            self.good_sum += 1
+
+    def error_rate(self, now: float) -> Optional[float]:
+        self._advance(now)
+        if not self.total_sum:
+            return None
+        return 1 - self.good_sum / self.total_sum
+
+
+class Objective:
+    """One SLO on one probe target, e.g. 99.9% of 'api' probes succeed"""
+
+    def __init__(self, name: str, target: str, objective: float, latency_ms: Optional[float] = None,
+                 rules=DEFAULT_RULES):
+        self.name = name
+        self.target = target
+        self.objective = objective
+        self.latency_ms = latency_ms
+        self.rules = rules
+        self.windows: Dict[float, RollingCounter] = {}
+        for _, long_window, short_window, _ in rules:
+            for window in (long_window, short_window):
+                self.windows.setdefault(window, RollingCounter(window))
+        self.firing: Dict[str, bool] = {severity: False for severity, *_ in rules}
+
+    @property
+    def kind(self) -> str:
+        return 'availability' if self.latency_ms is None else 'latency'
+
+    def is_good(self, latency_ms: Optional[float], ok: bool) -> bool:
+        if not ok:
+            return False
+        return self.latency_ms is None or (latency_ms is not None and latency_ms <= self.latency_ms)
+
+    def record(self, latency_ms: Optional[float], ok: bool, now: float):
+        good = self.is_good(latency_ms, ok)
+        for counter in self.windows.values():
+            counter.add(good, now)
+
+    def burn_rate(self, window: float, now: float) -> Optional[float]:
+        error_rate = self.windows[window].error_rate(now)
+        if error_rate is None:
+            return None
+        return error_rate / (1 - self.objective)
+
+    def evaluate(self, now: float) -> List[Dict]:
+        """Update alert states; return the transitions"""
+        changes = []
+        for severity, long_window, short_window, factor in self.rules:
+            long_burn = self.burn_rate(long_window, now)
+            short_burn = self.burn_rate(short_window, now)
+            firing = (long_burn is not None and short_burn is not None
+                      and long_burn > factor and short_burn > factor)
+            if firing != self.firing[severity]:
+                self.firing[severity] = firing
+                changes.append({
+                    'objective': self.name,
+                    'target': self.target,
+                    'severity': severity,
+                    'state': 'firing' if firing else 'resolved',
+                    'burn_rate_long': round(long_burn, 3) if long_burn is not None else None,
+                    'burn_rate_short': round(short_burn, 3) if short_burn is not None else None,
+                    'windows_s': [long_window, short_window],
+                    'factor': factor,
+                    'at': now
+                })
+        return changes
+
+    def status(self, now: float) -> Dict:
+        longest = max(self.windows)
+        error_rate = self.windows[longest].error_rate(now)
+        return {
+            'name': self.name,
+            'target': self.target,
+            'kind': self.kind,
+            'objective': self.objective,
+            'latency_ms': self.latency_ms,
+            'burn_rates': {
+                f'{int(window)}s': round(rate, 3) if rate is not None else None
+                for window in sorted(self.windows)
+                for rate in (self.burn_rate(window, now),)
+            },
+            # Share of the longest window's error budget still unspent
+            'budget_remaining': round(1 - error_rate / (1 - self.objective), 4) if error_rate is not None else None,
+            'alerts': {severity: 'firing' if firing else 'ok' for severity, firing in self.firing.items()}
+        }
+
+
+class RecordingNotifier:
+    """Keeps alert transitions in memory; the local stand-in for a webhook"""
+
+    def __init__(self, max_events: int = 1000):
+        self.events: deque = deque(maxlen=max_events)
+
+    def __call__(self, event: Dict):
+        self.events.append(event)
+
+
+class WebhookNotifier:
+    """POSTs each alert transition as JSON from a background thread"""
+
+    def __init__(self, url: str, timeout: float = 5.0, max_queue: int = 1000):
+        self.url = url
+        self.timeout = timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.sent = 0
+        self.failed = 0
+        threading.Thread(target=self._run, name='slo-webhook', daemon=True).start()
+
+    def __call__(self, event: Dict):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.failed += 1
+            logger.warning("SLO webhook queue full; dropping alert")
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            request = urllib.request.Request(
+                self.url, data=json.dumps(event, default=str).encode(),
+                headers={'Content-Type': 'application/json'}, method='POST'
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"SLO webhook to {self.url} failed: {e}")
+
+
+class SLOEngine:
+    """Feeds probe samples to objectives and fans out alert transitions"""
+
+    def __init__(self, objectives: List[Objective], notifiers: Optional[List[Callable[[Dict], None]]] = None,
+                 history: int = 200):
+        self.objectives = objectives
+        self.by_target: Dict[str, List[Objective]] = {}
+        for objective in objectives:
+            self.by_target.setdefault(objective.target, []).append(objective)
+        self.notifiers = list(notifiers or [])
+        self.recent: deque = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def record(self, target: str, latency_ms: Optional[float], ok: bool, now: Optional[float] = None):
+        """Add one probe sample and re-evaluate the objectives on that target"""
+        now = time.time() if now is None else now
+        changes = []
+        with self._lock:
+            for objective in self.by_target.get(target, ()):
+                objective.record(latency_ms, ok, now)
+                changes.extend(objective.evaluate(now))
+            self.recent.extend(changes)
+        for change in changes:
+            logger.info(f"SLO {change['objective']} {change['severity']} {change['state']}")
+            for notify in self.notifiers:
+                try:
+                    notify(change)
+                except Exception as e:
+                    logger.warning(f"SLO notifier failed: {e}")
+
+    def status(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            return {
+                'objectives': [objective.status(now) for objective in self.objectives],
+                'recent_alerts': list(self.recent)[-20:],
+                'timestamp': now
+            }
+
+
+def load_objectives(config: Optional[str]) -> List[Objective]:
+    """Objectives from a JSON file ([{name, target, objective, latency_ms?}]) or defaults"""
+    if config:
+        with open(config, encoding='utf-8') as handle:
+            items = json.load(handle)
+        return [Objective(item['name'], item['target'], float(item['objective']), item.get('latency_ms'))
+                for item in items]
+    return [
+        Objective('api-availability', 'api', 0.999),
+        Objective('api-latency', 'api', 0.99, latency_ms=250),
+        Objective('database-availability', 'database', 0.995),
+    ]
+
+
+def serve_sink(port: int):
+    """Print every webhook POST; a local stand-in for the alerting endpoint"""
+    class SinkHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            print(body.decode(errors='replace'), flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = HTTPServer(('127.0.0.1', port), SinkHandler)
+    print(f"[slo] webhook sink on http://127.0.0.1:{port}/", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='SLO burn-rate tools.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sink = sub.add_parser('sink', help='Run a local webhook receiver that prints alerts')
+    sink.add_argument('--port', type=int, default=9099)
+    args = parser.parse_args()
+    if args.command == 'sink':
+        serve_sink(args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
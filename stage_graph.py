@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Streaming producer/consumer stages
+- A linear chain of stages joined by bounded queues: a slow stage blocks
+  its producers instead of letting lists pile up, so memory stays flat
+- Each stage runs its own worker threads; items move on as soon as they
+  are processed, so the first firm reaches the last stage while discovery
+  is still running
+- Batch stages collect up to batch_size items, or whatever arrived within
+  max_wait seconds, and hand the list to fn (e.g. one COPY per batch)
+- fn returns an iterable of items for the next stage (None drops the item);
+  a failing item is logged and counted, not fatal to the run
+- Code running inside a stage can add its own counters to the stage's
+  stats through current_stage().count(...)
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_local = threading.local()
+
+
+class Stage:
+    """One step of a StageGraph: fn(item) or fn(batch) -> iterable of outputs"""
+
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Iterable]], workers: int = 1,
+                 batch_size: int = 1, max_wait: float = 0.5, queue_size: int = 64):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.stats = {'in': 0, 'out': 0, 'errors': 0, 'calls': 0, 'busy_s': 0.0, 'max_queue': 0}
+        self._lock = threading.Lock()
+        self._running = 0
+
+    def count(self, **deltas):
+        """Add to this stage's stats; unknown names start at zero"""
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] = self.stats.get(key, 0) + value
+            self.stats['max_queue'] = max(self.stats['max_queue'], self.queue.qsize())
+
+    def _next_batch(self) -> Tuple[List, bool]:
+        """Up to batch_size items; flushes early after max_wait. Returns (items, done)"""
+        first = self.queue.get()
+        if first is _DONE:
+            return [], True
+        items = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=max(remaining, 0)) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+
+def current_stage() -> Optional[Stage]:
+    """The stage whose worker is running the calling thread, if any"""
+    return getattr(_local, 'stage', None)
+
+
+class StageGraph:
+    """Runs source items through stages in order; returns per-stage stats"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+
+    def _emit(self, index: int, outputs: Optional[Iterable]):
+        if outputs is None:
+            return
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        count = 0
+        for output in outputs:
+            count += 1
+            if downstream is not None:
+                downstream.queue.put(output)
+        self.stages[index].count(out=count)
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        _local.stage = stage
+        done = False
+        while not done:
+            if stage.batch_size > 1:
+                items, done = stage._next_batch()
+                if not items:
+                    continue
+                work = items
+            else:
+                item = stage.queue.get()
+                if item is _DONE:
+                    break
+                items, work = [item], item
+            started = time.monotonic()
+            try:
+                self._emit(index, stage.fn(work))
+            except Exception as e:
+                logger.error(f"⚠️  Stage {stage.name} failed on {len(items)} item(s): {e}")
+                stage.count(errors=len(items))
+            stage.count(**{'in': len(items), 'calls': 1, 'busy_s': time.monotonic() - started})
+        # The last worker of a stage closes the next stage
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last and index + 1 < len(self.stages):
+            downstream = self.stages[index + 1]
+            for _ in range(downstream.workers):
+                downstream.queue.put(_DONE)
+
+    def run(self, source: Iterable) -> Dict[str, Dict]:
+        threads = []
+        for index, stage in enumerate(self.stages):
+            stage._running = stage.workers
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index,),
+                                          name=f'stage-{stage.name}-{n}', daemon=True)
+                thread.start()
+                threads.append(thread)
+        first = self.stages[0]
+        for item in source:
+            first.queue.put(item)
+        for _ in range(first.workers):
+            first.queue.put(_DONE)
+        for thread in threads:
+            thread.join()
+        return {stage.name: dict(stage.stats) for stage in self.stages}